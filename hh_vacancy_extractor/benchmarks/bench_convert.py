@@ -0,0 +1,94 @@
+"""Benchmark JSON to CSV conversion on a synthetic dataset.
+
+Run from the hh_vacancy_extractor directory:
+    python -m benchmarks.bench_convert --count 100000
+"""
+import argparse
+import os
+import tempfile
+from typing import Any, Dict, List
+
+from models.models import JsonItemReader, JsonToCsvExtractor
+from benchmarks.harness import measure, report
+from benchmarks.synthetic import write_dataset
+
+MODES = ['parse', 'legacy', 'trie']
+
+
+class LegacyJsonToCsvExtractor(JsonToCsvExtractor):
+    """Per-field dot-path lookup, as convert did before FieldPathTrie"""
+    def _build_row(self, item: Any) -> List[Any]:
+        row = []
+        for field in self._accessor.fields:
+            value = self._get_nested_value(item, field)
+            if self.flatten_nested and isinstance(value, (dict, list)):
+                value = self._flatten_value(value)
+            row.append(value)
+        return row
+    
+    @staticmethod
+    def _get_nested_value(data: Dict, field_path: str) -> Any:
+        value = data
+        for key in field_path.split('.'):
+            if isinstance(value, list) and key.isdigit():
+                key = int(key)
+                if key < len(value):
+                    value = value[key]
+                else:
+                    return None
+            elif isinstance(value, dict) and key in value:
+                value = value[key]
+            else:
+                return None
+        return value
+
+
+def run_mode(mode: str, input_file: str, output_file: str) -> int:
+    """Run one conversion mode and return the number of rows processed"""
+    if mode == 'parse':
+        return sum(1 for _ in JsonItemReader(input_file))
+    extractor_class = LegacyJsonToCsvExtractor if mode == 'legacy' else JsonToCsvExtractor
+    extractor_class(input_file=input_file, output_file=output_file, fields=None,
+                    all_fields=True, flatten_nested=True, delimiter=',').extract()
+    with open(output_file, 'rb') as f:
+        return sum(1 for _ in f) - 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON to CSV conversion')
+    parser.add_argument('--count', type=int, default=100000, help='Number of synthetic vacancies')
+    parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                        help='Synthetic input format')
+    parser.add_argument('--mode', choices=MODES + ['all'], default='all',
+                        help='What to measure (default: all, in one process)')
+    parser.add_argument('--input', default=None, help='Reuse an existing input file')
+    parser.add_argument('--workdir', default=None, help='Directory for temporary files')
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help='Track allocations with tracemalloc (slower)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        input_file = args.input
+        if input_file is None:
+            input_file = os.path.join(workdir, f"vacancies.{args.format}")
+            write_dataset(input_file, args.count, args.format)
+        if not args.json:
+            size_mb = os.path.getsize(input_file) / 2 ** 20
+            print(f"Input: {input_file}, {size_mb:.1f} MB")
+        
+        outputs = {}
+        for mode in (MODES if args.mode == 'all' else [args.mode]):
+            outputs[mode] = os.path.join(workdir, f"{mode}.csv")
+            rows, stats = measure(lambda: run_mode(mode, input_file, outputs[mode]),
+                                  args.trace_allocations)
+            stats.update(rows=rows, rows_per_sec=rows / stats['seconds'])
+            report(f"convert {mode}", stats, args.json)
+        
+        if 'legacy' in outputs and 'trie' in outputs and not args.json:
+            with open(outputs['legacy'], 'rb') as a, open(outputs['trie'], 'rb') as b:
+                print(f"  outputs identical: {a.read() == b.read()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark HHDataFetcher against the local mock API.
+
+Run from the hh_vacancy_extractor directory:
+    python -m benchmarks.bench_fetch --scenario concurrent --count 10000
+The mock API runs in its own process, so time, RSS and allocations cover only the client.
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, Optional, Tuple
+from urllib.request import urlopen
+
+from models.models import HHDataFetcher, HHQuerySharder, HHRequestBuilder, RateLimiter
+from benchmarks.harness import measure, report
+
+SCENARIOS = ['sequential', 'concurrent', 'sharded', 'throttled']
+
+
+def start_server(count: int, latency: float,
+                 rate_limit: Optional[float]) -> Tuple[subprocess.Popen, str]:
+    """Start benchmarks.mock_server on a free port and return the process and its /vacancies URL"""
+    command = [sys.executable, '-m', 'benchmarks.mock_server', '--port', '0',
+               '--count', str(count), '--latency', str(latency)]
+    if rate_limit:
+        command += ['--rate-limit', str(rate_limit)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    banner = process.stdout.readline()
+    if not banner:
+        process.wait()
+        raise RuntimeError("Mock API server exited before it started listening")
+    return process, banner.split()[-1]
+
+
+def server_stats(url: str) -> Dict:
+    with urlopen(url.rsplit('/', 1)[0] + '/stats') as response:
+        return json.load(response)
+
+
+def run_scenario(scenario: str, concurrency: int) -> int:
+    """Fetch with the given strategy and return the number of vacancies retrieved"""
+    params = HHRequestBuilder().set_text('python').set_per_page(100).build()
+    if scenario == 'sharded':
+        sharder = HHQuerySharder(params, concurrency)
+        shards = sharder.plan()
+        return len(HHDataFetcher.merge_pages(sharder.iter_pages(shards))['items'])
+    
+    probe = HHDataFetcher.fetch_page(dict(params, per_page=1), 0)
+    pages = list(range(HHQuerySharder.pages_for(probe['found'], 100)))
+    workers = 1 if scenario == 'sequential' else concurrency
+    return len(HHDataFetcher.fetch_vacancies(params, pages, workers)['items'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark fetching from a local mock HH API')
+    parser.add_argument('--scenario', choices=SCENARIOS, default='concurrent')
+    parser.add_argument('--count', type=int, default=10000, help='Vacancies served by the mock API')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock API latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--server-rate', type=float, default=20.0,
+                        help='Mock API requests per second for the throttled scenario')
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help='Track allocations with tracemalloc (slower)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    
+    server_rate = args.server_rate if args.scenario == 'throttled' else None
+    server, url = start_server(args.count, args.latency, server_rate)
+    try:
+        HHDataFetcher.BASE_URL = url
+        HHDataFetcher.rate_limiter = RateLimiter(rate=1000.0)
+        rows, stats = measure(lambda: run_scenario(args.scenario, args.concurrency),
+                              args.trace_allocations)
+        counters = server_stats(url)
+    finally:
+        server.terminate()
+        server.wait()
+    
+    served = counters['requests'] - counters['throttled']
+    stats.update(rows=rows, pages=served, throttled=counters['throttled'],
+                 pages_per_sec=served / stats['seconds'], rows_per_sec=rows / stats['seconds'])
+    report(f"fetch {args.scenario}", stats, args.json)
+
+
+if __name__ == '__main__':
+    main()
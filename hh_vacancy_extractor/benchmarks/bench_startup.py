@@ -0,0 +1,98 @@
+"""Benchmark CLI start-up: short convert and fetch invocations, direct and through the daemon.
+
+Run from the hh_vacancy_extractor directory:
+    python -m benchmarks.bench_startup --runs 20
+Each invocation is a fresh `python main.py ...` process, as a cron harness would start it.
+The "eager" scenario imports requests before running main.py, which is what every
+command paid before the HTTP stack was imported lazily.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.mock_server import MockHHServer
+from benchmarks.synthetic import write_dataset
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'main.py')
+RUN_MAIN = ("import os, sys, runpy; sys.argv = sys.argv[1:]; "
+            "sys.path.insert(0, os.path.dirname(sys.argv[0])); ")
+EAGER = RUN_MAIN + "import requests; runpy.run_path(sys.argv[0], run_name='__main__')"
+PROBE = RUN_MAIN + ("runpy.run_path(sys.argv[0], run_name='__main__'); "
+                    "print('urllib3' in sys.modules, file=sys.stderr)")
+
+
+def time_runs(command: List[str], runs: int, env: Dict[str, str]) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, env=env)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def wait_for_socket(socket_path: str, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(socket_path):
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Daemon did not start on {socket_path}")
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI start-up time')
+    parser.add_argument('--runs', type=int, default=20, help='Invocations per scenario')
+    parser.add_argument('--count', type=int, default=100, help='Vacancies in the convert input')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as workdir, MockHHServer(1000, latency=0.0) as server:
+        input_file = os.path.join(workdir, 'vacancies.ndjson')
+        output_file = os.path.join(workdir, 'vacancies.csv')
+        socket_path = os.path.join(workdir, 'daemon.sock')
+        write_dataset(input_file, args.count, 'ndjson')
+        env = dict(os.environ, HH_API_URL=server.url)
+        
+        convert = ['convert', input_file, '--all', '-o', output_file]
+        fetch = ['fetch', '--page', '0', '--output', os.path.join(workdir, 'page.json')]
+        daemon = [sys.executable, MAIN, '--socket', socket_path]
+        scenarios = [
+            ('convert', [sys.executable, MAIN] + convert),
+            ('convert eager', [sys.executable, '-c', EAGER, MAIN] + convert),
+            ('convert via daemon', daemon + ['--via-daemon'] + convert),
+            ('fetch', [sys.executable, MAIN] + fetch),
+            ('fetch via daemon', daemon + ['--via-daemon'] + fetch),
+        ]
+        
+        probe = subprocess.run([sys.executable, '-c', PROBE, MAIN] + convert,
+                               check=True, capture_output=True, text=True, env=env)
+        results = {'convert_imports_http_stack': probe.stderr.strip().splitlines()[-1] == 'True'}
+        
+        daemon_process = subprocess.Popen(daemon + ['daemon'], stdout=subprocess.DEVNULL, env=env)
+        try:
+            wait_for_socket(socket_path)
+            for name, command in scenarios:
+                timings = time_runs(command, args.runs, env)
+                results[name] = {'median_ms': statistics.median(timings) * 1000,
+                                 'min_ms': min(timings) * 1000}
+        finally:
+            subprocess.run(daemon + ['daemon', '--stop'], stdout=subprocess.DEVNULL, env=env)
+            daemon_process.wait(timeout=10)
+    
+    if args.json:
+        print(json.dumps(results))
+        return
+    print(f"Start-up ({args.runs} runs each, convert of {args.count} vacancies):")
+    for name, stats in results.items():
+        if isinstance(stats, dict):
+            print(f"  {name + ':':<22} {stats['median_ms']:7.1f} ms median  {stats['min_ms']:7.1f} ms min")
+    print(f"  convert imports requests/urllib3: {'yes' if results['convert_imports_http_stack'] else 'no'}")
+
+
+if __name__ == '__main__':
+    main()
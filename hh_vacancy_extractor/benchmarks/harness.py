@@ -0,0 +1,44 @@
+import json
+import resource
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Tuple
+
+
+def measure(function: Callable[[], Any], trace_allocations: bool = False) -> Tuple[Any, Dict]:
+    """Run `function` and return its result with wall time, peak RSS and allocation stats"""
+    if trace_allocations:
+        tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    result = function()
+    stats = {'seconds': time.perf_counter() - start}
+    
+    stats['net_allocated_blocks'] = sys.getallocatedblocks() - blocks_before
+    if trace_allocations:
+        stats['traced_peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    
+    # ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    stats['peak_rss_mb'] = max_rss / 2 ** 20 if sys.platform == 'darwin' else max_rss / 2 ** 10
+    return result, stats
+
+
+def report(name: str, stats: Dict, as_json: bool = False) -> None:
+    if as_json:
+        print(json.dumps(dict(stats, name=name)))
+        return
+    
+    parts = [f"{stats['seconds']:7.2f}s"]
+    for key, label in (('pages_per_sec', 'pages/s'), ('rows_per_sec', 'rows/s')):
+        if key in stats:
+            parts.append(f"{stats[key]:9.0f} {label}")
+    parts.append(f"peak RSS {stats['peak_rss_mb']:7.1f} MB")
+    if 'traced_peak_mb' in stats:
+        parts.append(f"traced peak {stats['traced_peak_mb']:7.1f} MB")
+    parts.append(f"net blocks {stats['net_allocated_blocks']:+d}")
+    if stats.get('throttled'):
+        parts.append(f"{stats['throttled']} throttled")
+    print(f"  {name + ':':<22} " + '  '.join(parts))
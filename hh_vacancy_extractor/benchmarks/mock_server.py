@@ -0,0 +1,204 @@
+"""Local stand-in for the HH.ru /vacancies API.
+
+Serves synthetic vacancies with HH-style paging, the 2000-result depth cap,
+configurable latency and 429 throttling. Run from the hh_vacancy_extractor
+directory:
+    python -m benchmarks.mock_server --port 8000 --count 10000
+and point the fetcher at it with HH_API_URL=http://127.0.0.1:8000/vacancies.
+GET /stats returns the request and 429 counters and is not counted itself.
+"""
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.synthetic import generate_vacancies
+
+DEPTH_LIMIT = 2000
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+
+
+class MockHHServer:
+    """Threaded HTTP server imitating the parts of api.hh.ru used by the fetcher"""
+    def __init__(self, count: int = 10000, latency: float = 0.0, rate_limit: Optional[float] = None,
+                 port: int = 0, seed: int = 42):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+        self._burst = max(1.0, (rate_limit or 0.0) / 5)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+        
+        # Spread publication times over the last 30 days, newest first, like HH's default order
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        step = timedelta(days=30) / max(count, 1)
+        self.vacancies = []
+        for index, vacancy in enumerate(generate_vacancies(count, seed)):
+            vacancy['published_at'] = (now - step * index).strftime(DATE_FORMAT)
+            self.vacancies.append(vacancy)
+        self.by_id = {vacancy['id']: vacancy for vacancy in self.vacancies}
+        
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def do_GET(self):
+                server.handle(self)
+        
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+    
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}/vacancies"
+    
+    def start(self) -> 'MockHHServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+    
+    def __enter__(self) -> 'MockHHServer':
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        if request.path == '/stats':
+            with self._lock:
+                stats = {'requests': self.requests, 'throttled': self.throttled}
+            self._send(request, 200, stats)
+            return
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if not self._take_token():
+            with self._lock:
+                self.throttled += 1
+            self._send(request, 429, {'errors': [{'type': 'too_many_requests'}]}, {'Retry-After': '1'})
+            return
+        
+        url = urlparse(request.path)
+        query = parse_qs(url.query)
+        if url.path.startswith('/vacancies/'):
+            vacancy = self.by_id.get(url.path.rsplit('/', 1)[1])
+            if vacancy is None:
+                self._send(request, 404, {'errors': [{'type': 'not_found'}]})
+                return
+            detail = dict(vacancy, description=f"<p>{vacancy['snippet']['responsibility']}</p>",
+                          specializations=[])
+            self._send(request, 200, detail, etag_request=request)
+        elif url.path == '/vacancies':
+            self._send_search(request, query)
+        else:
+            self._send(request, 404, {'errors': [{'type': 'not_found'}]})
+    
+    def _send_search(self, request: BaseHTTPRequestHandler, query: Dict[str, List[str]]) -> None:
+        page = int(query.get('page', ['0'])[0])
+        per_page = int(query.get('per_page', ['20'])[0])
+        if (page + 1) * per_page > DEPTH_LIMIT:
+            self._send(request, 400, {'errors': [{'type': 'bad_argument', 'value': 'page'}]})
+            return
+        
+        items = self._filter(query)
+        self._send(request, 200, {
+            'items': items[page * per_page:(page + 1) * per_page],
+            'found': len(items),
+            'pages': -(-min(len(items), DEPTH_LIMIT) // per_page),
+            'page': page,
+            'per_page': per_page,
+        }, etag_request=request)
+    
+    def _filter(self, query: Dict[str, List[str]]) -> List[Dict]:
+        items = self.vacancies
+        if 'experience' in query:
+            items = [item for item in items if item['experience']['id'] in query['experience']]
+        if 'work_format' in query:
+            items = [item for item in items
+                     if any(fmt['id'] in query['work_format'] for fmt in item['work_format'])]
+        if 'only_with_salary' in query and query['only_with_salary'][0] == 'true':
+            items = [item for item in items if item['salary']]
+        if 'date_from' in query:
+            date_from = datetime.strptime(query['date_from'][0], DATE_FORMAT)
+            items = [item for item in items
+                     if datetime.strptime(item['published_at'], DATE_FORMAT) >= date_from]
+        if 'date_to' in query:
+            date_to = datetime.strptime(query['date_to'][0], DATE_FORMAT)
+            items = [item for item in items
+                     if datetime.strptime(item['published_at'], DATE_FORMAT) <= date_to]
+        if 'period' in query:
+            since = datetime.now(timezone.utc) - timedelta(days=int(query['period'][0]))
+            items = [item for item in items
+                     if datetime.strptime(item['published_at'], DATE_FORMAT) >= since]
+        return items
+    
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updated) * self.rate_limit)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+    
+    @staticmethod
+    def _send(request: BaseHTTPRequestHandler, status: int, body: Dict,
+              headers: Optional[Dict[str, str]] = None,
+              etag_request: Optional[BaseHTTPRequestHandler] = None) -> None:
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        headers = dict(headers or {})
+        if etag_request is not None:
+            etag = '"' + hashlib.md5(data).hexdigest() + '"'
+            headers['ETag'] = etag
+            if etag_request.headers.get('If-None-Match') == etag:
+                status, data = 304, b''
+        
+        request.send_response(status)
+        if data:
+            request.send_header('Content-Type', 'application/json; charset=utf-8')
+        request.send_header('Content-Length', str(len(data)))
+        for name, value in headers.items():
+            request.send_header(name, value)
+        request.end_headers()
+        request.wfile.write(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock of the HH.ru vacancies API')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (0 picks a free one)')
+    parser.add_argument('--count', type=int, default=10000, help='Number of synthetic vacancies')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds of delay per request')
+    parser.add_argument('--rate-limit', type=float, default=None,
+                        help='Requests per second before answering 429')
+    args = parser.parse_args()
+    
+    server = MockHHServer(args.count, args.latency, args.rate_limit, args.port)
+    print(f"Serving {args.count} vacancies at {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Run the fetch and convert benchmarks, each scenario in a fresh process.
+
+Run from the hh_vacancy_extractor directory:
+    python -m benchmarks.run --count 20000
+Separate processes keep peak RSS figures independent between scenarios.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.bench_fetch import SCENARIOS
+from benchmarks.harness import report
+from benchmarks.synthetic import write_dataset
+
+
+def run_benchmark(module: str, arguments: list) -> dict:
+    output = subprocess.run([sys.executable, '-m', module, '--json'] + arguments,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run all fetch and convert benchmarks')
+    parser.add_argument('--count', type=int, default=20000, help='Number of synthetic vacancies')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mock API latency in seconds')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help='Track allocations with tracemalloc (slower)')
+    args = parser.parse_args()
+    extra = ['--trace-allocations'] if args.trace_allocations else []
+    
+    print(f"Fetch ({args.count} vacancies, {args.latency * 1000:.0f} ms latency):")
+    for scenario in SCENARIOS:
+        stats = run_benchmark('benchmarks.bench_fetch', [
+            '--scenario', scenario, '--count', str(args.count), '--latency', str(args.latency),
+            '--concurrency', str(args.concurrency)] + extra)
+        report(stats.pop('name'), stats)
+    
+    with tempfile.TemporaryDirectory() as workdir:
+        for fmt in ('json', 'ndjson'):
+            input_file = os.path.join(workdir, f"vacancies.{fmt}")
+            write_dataset(input_file, args.count, fmt)
+            print(f"Convert ({args.count} vacancies, {fmt}, "
+                  f"{os.path.getsize(input_file) / 2 ** 20:.1f} MB):")
+            for mode in ('parse', 'legacy', 'trie'):
+                stats = run_benchmark('benchmarks.bench_convert', [
+                    '--mode', mode, '--input', input_file, '--workdir', workdir] + extra)
+                report(stats.pop('name'), stats)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import json
+import random
+from typing import Dict, Iterator, Optional
+
+AREAS = [('1', 'Москва'), ('2', 'Санкт-Петербург'), ('3', 'Екатеринбург'),
+         ('4', 'Новосибирск'), ('88', 'Казань'), ('66', 'Нижний Новгород')]
+EXPERIENCE = [('noExperience', 'Нет опыта'), ('between1And3', 'От 1 года до 3 лет'),
+              ('between3And6', 'От 3 до 6 лет'), ('moreThan6', 'Более 6 лет')]
+WORK_FORMATS = [('ON_SITE', 'На месте работодателя'), ('REMOTE', 'Удалённо'),
+                ('HYBRID', 'Гибрид'), ('FIELD_WORK', 'Разъездной')]
+ROLES = [('96', 'Программист, разработчик'), ('10', 'Аналитик'),
+         ('104', 'Руководитель группы разработки'), ('160', 'DevOps-инженер')]
+SKILLS = ['Python', 'Django', 'FastAPI', 'PostgreSQL', 'Docker', 'Kubernetes', 'Git',
+          'Linux', 'Redis', 'Kafka', 'SQL', 'REST', 'asyncio', 'Celery', 'pandas']
+METRO_LINES = [('1', 'Сокольническая'), ('2', 'Замоскворецкая'), ('5', 'Кольцевая')]
+CURRENCIES = ['RUB', 'RUB', 'RUB', 'RUB', 'USD', 'EUR']
+
+
+def generate_vacancy(rng: random.Random, index: int, full: bool = False) -> Dict:
+    """Build one vacancy shaped like an item of the HH.ru /vacancies response"""
+    vacancy_id = str(100000000 + index)
+    employer_id = str(rng.randint(1, 5000))
+    area_id, area_name = rng.choice(AREAS)
+    experience = rng.choice(EXPERIENCE)
+    published_at = (f"2026-{rng.randint(1, 10):02d}-{rng.randint(1, 28):02d}"
+                    f"T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00+0300")
+    
+    salary = None
+    if full or rng.random() < 0.6:
+        low = rng.randint(30, 400) * 1000
+        salary = {
+            'from': low if full or rng.random() < 0.8 else None,
+            'to': low + rng.randint(0, 200) * 1000 if full or rng.random() < 0.6 else None,
+            'currency': rng.choice(CURRENCIES),
+            'gross': rng.random() < 0.5,
+        }
+    
+    address = None
+    if full or rng.random() < 0.5:
+        stations = []
+        for _ in range(3 if full else rng.randint(0, 3)):
+            line_id, line_name = rng.choice(METRO_LINES)
+            station_id = f"{line_id}.{rng.randint(1, 300)}"
+            stations.append({
+                'station_name': f"Станция {station_id}", 'line_name': line_name,
+                'station_id': station_id, 'line_id': line_id,
+                'lat': 55.5 + rng.random(), 'lng': 37.3 + rng.random(),
+            })
+        address = {
+            'city': area_name, 'street': f"улица {rng.randint(1, 99)}",
+            'building': str(rng.randint(1, 120)), 'lat': 55.5 + rng.random(),
+            'lng': 37.3 + rng.random(), 'description': None,
+            'raw': f"{area_name}, улица {rng.randint(1, 99)}",
+            'metro': stations[0] if stations else None, 'metro_stations': stations,
+        }
+    
+    return {
+        'id': vacancy_id,
+        'premium': rng.random() < 0.05,
+        'name': f"{rng.choice(['Junior', 'Middle', 'Senior', 'Lead'])} Python developer",
+        'department': None,
+        'has_test': rng.random() < 0.1,
+        'response_letter_required': rng.random() < 0.1,
+        'area': {'id': area_id, 'name': area_name, 'url': f"https://api.hh.ru/areas/{area_id}"},
+        'salary': salary,
+        'type': {'id': 'open', 'name': 'Открытая'},
+        'address': address,
+        'response_url': None,
+        'sort_point_distance': None,
+        'published_at': published_at,
+        'created_at': published_at,
+        'archived': False,
+        'apply_alternate_url': f"https://hh.ru/applicant/vacancy_response?vacancyId={vacancy_id}",
+        'url': f"https://api.hh.ru/vacancies/{vacancy_id}?host=hh.ru",
+        'alternate_url': f"https://hh.ru/vacancy/{vacancy_id}",
+        'relations': [],
+        'employer': {
+            'id': employer_id,
+            'name': f"Компания {employer_id}",
+            'url': f"https://api.hh.ru/employers/{employer_id}",
+            'alternate_url': f"https://hh.ru/employer/{employer_id}",
+            'logo_urls': {
+                'original': f"https://img.hhcdn.ru/employer-logo-original/{employer_id}.png",
+                '90': f"https://img.hhcdn.ru/employer-logo/{employer_id}-90.png",
+                '240': f"https://img.hhcdn.ru/employer-logo/{employer_id}-240.png",
+            } if full or rng.random() < 0.7 else None,
+            'vacancies_url': f"https://api.hh.ru/vacancies?employer_id={employer_id}",
+            'accredited_it_employer': rng.random() < 0.3,
+            'trusted': True,
+        },
+        'snippet': {
+            'requirement': f"Опыт работы с {', '.join(rng.sample(SKILLS, 3))}.",
+            'responsibility': "Разработка и поддержка backend-сервисов.",
+        },
+        'contacts': None,
+        'schedule': {'id': 'fullDay', 'name': 'Полный день'},
+        'working_days': [],
+        'working_time_intervals': [],
+        'working_time_modes': [],
+        'accept_temporary': rng.random() < 0.1,
+        'work_format': [{'id': fid, 'name': fname}
+                        for fid, fname in rng.sample(WORK_FORMATS, 2 if full else rng.randint(1, 2))],
+        'working_hours': [{'id': 'HOURS_8', 'name': '8 часов'}],
+        'work_schedule_by_days': [{'id': 'FIVE_ON_TWO_OFF', 'name': '5/2'}],
+        'night_shifts': False,
+        'professional_roles': [{'id': role_id, 'name': role_name}
+                               for role_id, role_name in [rng.choice(ROLES)]],
+        'key_skills': [{'name': skill} for skill in rng.sample(SKILLS, rng.randint(0, 5))],
+        'accept_incomplete_resumes': rng.random() < 0.2,
+        'experience': {'id': experience[0], 'name': experience[1]},
+        'employment': {'id': 'full', 'name': 'Полная занятость'},
+        'employment_form': {'id': 'FULL', 'name': 'Полная'},
+        'internship': False,
+        'is_adv_vacancy': False,
+    }
+
+
+def generate_vacancies(count: int, seed: int = 42) -> Iterator[Dict]:
+    """Yield `count` vacancies; the first one has every optional field filled in"""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield generate_vacancy(rng, index, full=index == 0)
+
+
+def write_dataset(path: str, count: int, fmt: str = 'json', seed: int = 42,
+                  found: Optional[int] = None) -> None:
+    """Write a synthetic fetch output in the HH.ru envelope or as NDJSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        if fmt == 'ndjson':
+            for vacancy in generate_vacancies(count, seed):
+                f.write(json.dumps(vacancy, ensure_ascii=False, separators=(',', ':')))
+                f.write('\n')
+            return
+        
+        f.write('{"items": [\n')
+        for index, vacancy in enumerate(generate_vacancies(count, seed)):
+            if index:
+                f.write(',\n')
+            f.write(json.dumps(vacancy, ensure_ascii=False))
+        f.write(f'\n], "found": {found if found is not None else count}, "pages": 1}}\n')
@@ -1,12 +1,44 @@
 from views.views import ConsoleView
 import argparse
+import glob
+import io
+import os
+import socket
+import stat
+import struct
+import traceback
+from contextlib import nullcontext, redirect_stderr, redirect_stdout
 from models.models import *
 
+def expand_inputs(patterns: List[str], view: ConsoleView) -> Optional[List[str]]:
+    """Expand file paths and glob patterns into a list of unique input files"""
+    input_files = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            view.display_error(f"No input files match {pattern}")
+            return None
+        input_files.extend(path for path in matches if path not in input_files)
+    return input_files
+
+
 class HHDataController:
     """Controller for HH.ru data fetching operations"""
+    QUERY_ARGUMENTS = {
+        'text': None, 'search_fields': None, 'only_with_salary': False, 'salary': None,
+        'currency': None, 'experience': None, 'employment_form': None, 'accept_temporary': False,
+        'label': None, 'work_schedule': None, 'working_hours': None, 'work_format': None,
+        'period': None, 'page': None, 'per_page': None
+    }
+    LIST_ARGUMENTS = ('search_fields', 'experience', 'employment_form', 'label',
+                      'work_schedule', 'working_hours', 'work_format')
+    
     def __init__(self, view: ConsoleView):
         self.view = view
         self.builder = HHRequestBuilder()
+        self.cache = None
+        self.store = None
+        self.metrics = None
     
     def build_request(self, args: argparse.Namespace) -> Dict:
         if args.text:
@@ -42,25 +74,300 @@ class HHDataController:
         self.view.display_parameters(params)
         return params
     
-    def fetch_data(self, params: Dict, pages: Optional[List[int]], output_file: str) -> bool:
-        result = HHDataFetcher.fetch_vacancies(params, pages)
+    def configure_rate_limit(self, args: argparse.Namespace) -> None:
+        HHDataFetcher.rate_limiter = RateLimiter(rate=args.rate_limit)
+        HHDataFetcher.max_retries = args.max_retries
+    
+    def build_store(self, args: argparse.Namespace) -> Optional[VacancyStore]:
+        if args.db:
+            self.store = VacancyStore(args.db)
+        return self.store
+    
+    def build_metrics(self, args: argparse.Namespace) -> Optional[MetricsRecorder]:
+        if args.metrics_out:
+            self.metrics = MetricsRecorder()
+        HHDataFetcher.metrics = self.metrics
+        return self.metrics
+    
+    def write_metrics(self, output_file: Optional[str]) -> None:
+        if self.metrics is not None and output_file:
+            self.metrics.write(output_file)
+            self.view.display_message(f"Metrics written to {output_file}")
+    
+    def build_cache(self, args: argparse.Namespace) -> Optional[HHResponseCache]:
+        if args.cache_dir:
+            self.cache = HHResponseCache(args.cache_dir, args.cache_ttl,
+                                         args.cache_max_entries, args.cache_revalidate)
+        return self.cache
+    
+    def fetch_data(self, params: Dict, pages: Optional[List[int]], output_file: str,
+                   concurrency: int = 1, output_format: str = 'json',
+                   journal_file: Optional[str] = None, resume: bool = False) -> bool:
+        page_count = len(pages) if pages else None
+        journal = None
+        if pages and journal_file:
+            journal = PageJournal(journal_file, params)
+            finished = journal.open(resume)
+            if finished is None:
+                self.view.display_error(
+                    f"Journal {journal_file} belongs to a different query; remove it or run without --resume"
+                )
+                return False
+            if finished:
+                self.view.display_message(f"Resuming: {len(finished)} pages already fetched")
+            page_results = self._iter_journaled(params, pages, concurrency, journal, finished)
+        elif pages is not None:
+            page_results = HHDataFetcher.iter_pages(params, pages, concurrency, self.cache)
+        else:
+            page_results = [(None, HHDataFetcher.fetch_page(params, cache=self.cache))]
+        
+        if output_format == 'ndjson':
+            success = self._stream_data(page_results, output_file, page_count)
+        else:
+            if pages is None:
+                result = page_results[0][1]
+            else:
+                result = HHDataFetcher.merge_pages(page_results)
+            self._display_cache_stats()
+            success = self._save_result(result, output_file, page_count)
+        
+        if journal is not None:
+            # The journal is only needed again if some pages are still missing
+            journal.close(remove=success)
+        return success
+    
+    def _iter_journaled(self, params: Dict, pages: List[int], concurrency: int,
+                        journal: PageJournal, finished: Dict[int, Dict]) -> Iterator[Tuple[int, Optional[Dict]]]:
+        """Yield every page in order, replaying finished pages and journaling newly fetched ones"""
+        missing = [page for page in pages if page not in finished]
+        fetched = HHDataFetcher.iter_pages(params, missing, concurrency, self.cache)
+        for page in pages:
+            if page in finished:
+                yield page, finished[page]
+                continue
+            page, data = next(fetched)
+            if data is not None:
+                journal.record(page, data)
+            yield page, data
+    
+    def fetch_sharded(self, params: Dict, output_file: str, concurrency: int = 1,
+                      output_format: str = 'json') -> bool:
+        sharder = HHQuerySharder(params, concurrency, self.cache)
+        shards = sharder.plan()
+        if not shards:
+            self.view.display_error("Failed to fetch data")
+            return False
+        self.view.display_message(
+            f"Fetching {sharder.found} vacancies in {len(shards)} shards ({sharder.total_pages} pages)..."
+        )
+        
+        page_results = sharder.iter_pages(shards)
+        if output_format == 'ndjson':
+            return self._stream_data(page_results, output_file, sharder.total_pages)
         
+        result = HHDataFetcher.merge_pages(page_results)
+        self._display_cache_stats()
+        return self._save_result(result, output_file, sharder.total_pages)
+    
+    def fetch_incremental(self, params: Dict, output_file: str, state_dir: str,
+                          output_format: str = 'ndjson') -> bool:
+        if output_format != 'ndjson':
+            self.view.display_error("--incremental appends to the output file and requires --format ndjson")
+            return False
+        
+        sync = HHIncrementalSync(params, state_dir)
+        if sync.watermark:
+            self.view.display_message(f"Fetching vacancies published since {sync.watermark}...")
+        
+        # found/pages describe a single response, so they would be stale after the next append
+        items = NdjsonWriter.read_metadata(output_file).get('items', 0)
+        with NdjsonWriter(output_file, 'a') as writer:
+            for page, data in sync.iter_pages():
+                if data is None:
+                    continue
+                self._write_items(writer, data.get('items', []))
+                self._store_items(data.get('items', []))
+            writer.write_metadata({'items': items + writer.count})
+        new_count = writer.count
+        
+        sync.save()
+        if sync.failed:
+            self.view.display_error(
+                f"Some pages failed; appended {new_count} new vacancies to {output_file} "
+                f"without advancing the watermark"
+            )
+            return False
+        self.view.display_success(f"Appended {new_count} new vacancies to {output_file}")
+        return True
+    
+    def load_queries(self, query_file: str) -> Optional[List[Tuple[str, Dict, Optional[List[int]]]]]:
+        """Build (name, params, pages) for each query of a batch file; keys mirror fetch options"""
+        try:
+            with open(query_file, 'r', encoding='utf-8') as f:
+                definitions = json.load(f)
+        except (OSError, ValueError) as e:
+            self.view.display_error(f"Cannot read queries from {query_file}: {e}")
+            return None
+        if isinstance(definitions, dict):
+            definitions = definitions.get('queries', [])
+        
+        queries = []
+        for index, definition in enumerate(definitions):
+            options = {key.replace('-', '_'): value for key, value in definition.items()}
+            name = str(options.pop('name', f"query-{index + 1}"))
+            pages = options.pop('pages', None)
+            unknown = set(options) - set(self.QUERY_ARGUMENTS)
+            if unknown:
+                self.view.display_error(f"Unknown options in query {name}: {', '.join(sorted(unknown))}")
+                return None
+            if any(name == query[0] for query in queries):
+                self.view.display_error(f"Duplicate query name {name}")
+                return None
+            for key in self.LIST_ARGUMENTS:
+                if isinstance(options.get(key), str):
+                    options[key] = [options[key]]
+            
+            self.view.display_message(f"Query {name}:")
+            self.builder = HHRequestBuilder()
+            params = self.build_request(argparse.Namespace(**dict(self.QUERY_ARGUMENTS, **options)))
+            queries.append((name, params, [pages] if isinstance(pages, int) else pages))
+        return queries
+    
+    def fetch_batch(self, queries: List[Tuple[str, Dict, Optional[List[int]]]], output_file: str,
+                    concurrency: int = 1, output_format: str = 'json') -> bool:
+        fetcher = HHBatchFetcher(queries, concurrency, self.cache)
+        self.view.display_message(f"Fetching {len(queries)} queries...")
+        if output_format == 'ndjson':
+            with NdjsonWriter(output_file) as writer:
+                for name, page, data in fetcher.iter_pages():
+                    if data is not None:
+                        self._write_items(writer, data['items'])
+                        self._store_items(data['items'])
+                writer.write_metadata({'found': len(fetcher.matches), 'items': writer.count,
+                                       'queries': fetcher.summary, 'matches': fetcher.matches})
+            item_count = writer.count
+        else:
+            items = []
+            for name, page, data in fetcher.iter_pages():
+                if data is not None:
+                    items.extend(data['items'])
+                    self._store_items(data['items'])
+            self._write_json({'items': items, 'found': len(fetcher.matches),
+                              'queries': fetcher.summary, 'matches': fetcher.matches}, output_file)
+            item_count = len(items)
+        
+        self._display_cache_stats()
+        self.view.display_success(
+            f"Fetched {item_count} unique vacancies for {len(queries)} queries to {output_file}"
+        )
+        failed = [f"{name}:{page}" for name, summary in fetcher.summary.items()
+                  for page in summary['failed_pages']]
+        return self._report_failed_pages(failed)
+    
+    def fetch_details(self, input_file: str, output_file: str, concurrency: int = 1,
+                      cache_dir: Optional[str] = None, cache_max_entries: int = 100000) -> bool:
+        cache = HHResponseCache(cache_dir, ttl=None, max_entries=cache_max_entries) if cache_dir else None
+        fetcher = HHDetailFetcher(concurrency, cache)
+        with NdjsonWriter(output_file) as writer:
+            for record in fetcher.iter_enriched(JsonItemReader(input_file)):
+                self._write_items(writer, [record])
+        
+        if cache is not None:
+            self.view.display_cache_stats(cache.stats())
+        self.view.display_success(f"Wrote {writer.count} detailed vacancies to {output_file}")
+        if fetcher.failed_ids:
+            self.view.display_error(
+                f"{len(fetcher.failed_ids)} vacancies kept without details: {', '.join(fetcher.failed_ids)}"
+            )
+            return False
+        return True
+    
+    def _save_result(self, result: Optional[Dict], output_file: str,
+                     page_count: Optional[int]) -> bool:
         if result:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            self._write_json(result, output_file)
+            self._store_items(result.get('items', []))
             
-            if pages:
+            if page_count:
                 self.view.display_success(
-                    f"Fetched {len(result.get('items', []))} vacancies from {len(pages)} pages to {output_file}"
+                    f"Fetched {len(result.get('items', []))} vacancies from {page_count} pages to {output_file}"
                 )
             else:
                 self.view.display_success(
                     f"Fetched {len(result.get('items', []))} vacancies to {output_file}"
                 )
-            return True
+            return self._report_failed_pages(result.get('failed_pages', []))
         else:
             self.view.display_error("Failed to fetch data")
             return False
+    
+    def _stream_data(self, page_results: Iterable[Tuple[Any, Optional[Dict]]], output_file: str,
+                     page_count: Optional[int]) -> bool:
+        metadata = None
+        failed_pages = []
+        with NdjsonWriter(output_file) as writer:
+            for page, data in page_results:
+                if data is None:
+                    failed_pages.append(page)
+                    continue
+                if metadata is None:
+                    metadata = {'found': data.get('found', 0), 'pages': data.get('pages', 0)}
+                self._write_items(writer, data.get('items', []))
+                self._store_items(data.get('items', []))
+            self._display_cache_stats()
+            
+            if metadata is None:
+                self.view.display_error("Failed to fetch data")
+                return False
+            metadata['items'] = writer.count
+            if failed_pages:
+                metadata['failed_pages'] = failed_pages
+            writer.write_metadata(metadata)
+        
+        if page_count:
+            self.view.display_success(
+                f"Streamed {writer.count} vacancies from {page_count} pages to {output_file}"
+            )
+        else:
+            self.view.display_success(f"Streamed {writer.count} vacancies to {output_file}")
+        return self._report_failed_pages(failed_pages)
+    
+    def _write_json(self, result: Dict, output_file: str) -> None:
+        with self._stage('write'):
+            with open(output_file, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+        self._add_rows('write', len(result.get('items', [])))
+    
+    def _write_items(self, writer: NdjsonWriter, items: List[Dict]) -> None:
+        with self._stage('write'):
+            writer.write_items(items)
+        self._add_rows('write', len(items))
+    
+    def _store_items(self, items: List[Dict]) -> None:
+        if self.store is not None and items:
+            with self._stage('store'):
+                self.store.upsert(items)
+            self._add_rows('store', len(items))
+    
+    def _stage(self, name: str) -> Any:
+        return self.metrics.stage(name) if self.metrics is not None else nullcontext()
+    
+    def _add_rows(self, name: str, count: int) -> None:
+        if self.metrics is not None:
+            self.metrics.add_rows(name, count)
+    
+    def _report_failed_pages(self, failed_pages: List[Any]) -> bool:
+        if not failed_pages:
+            return True
+        self.view.display_error(
+            f"{len(failed_pages)} pages failed after retries and are missing from the output: "
+            f"{', '.join(str(page) for page in failed_pages)}"
+        )
+        return False
+    
+    def _display_cache_stats(self) -> None:
+        if self.cache is not None:
+            self.view.display_cache_stats(self.cache.stats())
 
 
 class JsonToCsvController:
@@ -72,19 +379,266 @@ class JsonToCsvController:
         if not args.all and not args.fields:
             self.view.display_error("You must specify either --all or --fields")
             return False
+        if args.explode_child and not args.explode:
+            self.view.display_error("--explode-child requires --explode")
+            return False
+        if not args.input and not args.db:
+            self.view.display_error("You must specify either an input file or --db")
+            return False
+        if args.db and not os.path.exists(args.db):
+            self.view.display_error(f"Database {args.db} does not exist")
+            return False
         
+        input_files = expand_inputs(args.input, self.view)
+        if input_files is None:
+            return False
+        
+        metrics = MetricsRecorder() if args.metrics_out else None
         builder = JsonToCsvBuilder()
         extractor = (builder
-                    .with_input_file(args.input)
+                    .with_input_files(input_files)
+                    .with_workers(args.workers, args.chunk_size * 2 ** 20)
                     .with_output_file(args.output)
                     .with_delimiter(args.delimiter)
-                    .with_flatten_nested(args.no_flatten))
+                    .with_flatten_nested(args.no_flatten)
+                    .with_schema_cache(args.schema_cache)
+                    .with_source_db(args.db, args.where)
+                    .with_explode(args.explode, args.explode_child)
+                    .with_metrics(metrics))
         
         if args.all:
             extractor = builder.with_all_fields().build()
         else:
             extractor = builder.with_fields(args.fields).build()
         
-        extractor.extract()
+        if metrics is None:
+            extractor.extract()
+        else:
+            with metrics.stage('convert'):
+                extractor.extract()
         self.view.display_success(f"Data extracted to {args.output}")
-        return True
\ No newline at end of file
+        if args.explode_child:
+            self.view.display_success(f"{args.explode} elements extracted to {args.explode_child}")
+        
+        if metrics is not None:
+            metrics.write(args.metrics_out)
+            self.view.display_message(f"Metrics written to {args.metrics_out}")
+        return True
+
+
+class VacancyStatsController:
+    """Controller for streaming vacancy statistics"""
+    def __init__(self, view: ConsoleView):
+        self.view = view
+    
+    def aggregate(self, args: argparse.Namespace) -> bool:
+        if not args.input and not args.db:
+            self.view.display_error("You must specify either an input file or --db")
+            return False
+        if args.db and not os.path.exists(args.db):
+            self.view.display_error(f"Database {args.db} does not exist")
+            return False
+        input_files = expand_inputs(args.input, self.view)
+        if input_files is None:
+            return False
+        
+        rates = None
+        if args.rates:
+            try:
+                with open(args.rates, 'r', encoding='utf-8') as f:
+                    rates = json.load(f)
+            except (OSError, ValueError) as e:
+                self.view.display_error(f"Cannot read exchange rates from {args.rates}: {e}")
+                return False
+        try:
+            normalizer = SalaryNormalizer(args.currency, rates)
+        except ValueError as e:
+            self.view.display_error(str(e))
+            return False
+        
+        aggregator = VacancyAggregator(args.group_by, normalizer, args.top_k, args.accuracy)
+        if args.db:
+            with VacancyStore(args.db, read_only=True) as store:
+                aggregator.add_all(store.iter_vacancies(args.where))
+        for input_file in input_files:
+            aggregator.add_all(JsonItemReader(input_file))
+        
+        result = aggregator.result(args.quantiles)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        self.view.display_aggregates(result)
+        self.view.display_success(
+            f"Aggregated {result['total']} vacancies into {len(result['groups'])} groups in {args.output}"
+        )
+        return True
+
+
+class VacancyIndexController:
+    """Controller for indexing fetched vacancies and searching them offline"""
+    def __init__(self, view: ConsoleView):
+        self.view = view
+    
+    def index(self, args: argparse.Namespace) -> bool:
+        input_files = expand_inputs(args.input, self.view)
+        if input_files is None:
+            return False
+        
+        index = VacancyIndex(args.index_dir)
+        indexed = unchanged = 0
+        for input_file in input_files:
+            added, skipped = index.add(JsonItemReader(input_file))
+            indexed += added
+            unchanged += skipped
+        if args.compact:
+            index.compact()
+        
+        self.view.display_success(
+            f"Indexed {indexed} vacancies into {args.index_dir} ({unchanged} unchanged, "
+            f"{len(index.manifest['segments'])} segments)"
+        )
+        return True
+    
+    def search(self, args: argparse.Namespace) -> bool:
+        if not os.path.exists(os.path.join(args.index_dir, 'manifest.json')):
+            self.view.display_error(f"No index in {args.index_dir}; run the index command first")
+            return False
+        
+        started = time.perf_counter()
+        index = VacancyIndex(args.index_dir)
+        count = 0
+        try:
+            with open(args.output, 'wb') as f:
+                for line in index.search(args.query, args.limit):
+                    if args.ids:
+                        line = f"{json.loads(line)['id']}\n".encode('utf-8')
+                    f.write(line)
+                    count += 1
+        except ValueError as e:
+            self.view.display_error(str(e))
+            return False
+        
+        elapsed = (time.perf_counter() - started) * 1000
+        self.view.display_success(f"Found {count} vacancies in {elapsed:.1f} ms, written to {args.output}")
+        return True
+
+
+class DaemonOutput(io.TextIOBase):
+    """Stream that forwards everything a command prints to the daemon client"""
+    def __init__(self, connection: socket.socket):
+        self.connection = connection
+        self.closed_by_client = False
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, text: str) -> int:
+        self.send({'output': text})
+        return len(text)
+    
+    def send(self, reply: Dict) -> None:
+        if self.closed_by_client:
+            return
+        try:
+            self.connection.sendall(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+        except OSError:
+            # The client went away; let the command finish without an audience
+            self.closed_by_client = True
+
+
+class DaemonController:
+    """Controller for serving commands from one long-lived process over a unix socket"""
+    def __init__(self, view: ConsoleView):
+        self.view = view
+    
+    def serve(self, socket_path: str, run: Callable[[List[str]], bool]) -> bool:
+        socket_dir = os.path.dirname(os.path.abspath(socket_path))
+        os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+        info = os.stat(socket_dir)
+        shared = info.st_mode & 0o022 and not info.st_mode & stat.S_ISVTX
+        if info.st_uid not in (os.getuid(), 0) or shared:
+            self.view.display_error(f"{socket_dir} is not private to this user; choose another --socket")
+            return False
+        
+        if os.path.exists(socket_path):
+            if os.lstat(socket_path).st_uid != os.getuid():
+                self.view.display_error(f"{socket_path} belongs to another user")
+                return False
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(socket_path)
+                self.view.display_error(f"A daemon is already listening on {socket_path}")
+                return False
+            except OSError:
+                os.remove(socket_path)
+            finally:
+                probe.close()
+        
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket owner-only from the start instead of narrowing it after bind
+        umask = os.umask(0o177)
+        try:
+            server.bind(socket_path)
+        finally:
+            os.umask(umask)
+        server.listen()
+        self.view.display_message(f"Listening on {socket_path}")
+        try:
+            # Commands run one at a time: they share HHDataFetcher's session, limiter and settings
+            while True:
+                connection, _ = server.accept()
+                with connection:
+                    if self._peer_uid(connection) not in (None, os.getuid()):
+                        continue
+                    if not self._handle(connection, run):
+                        break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.close()
+            os.remove(socket_path)
+        self.view.display_message("Daemon stopped")
+        return True
+    
+    @staticmethod
+    def _peer_uid(connection: socket.socket) -> Optional[int]:
+        """User id of the connected client, or None where the platform does not report it"""
+        if not hasattr(socket, 'SO_PEERCRED'):
+            return None
+        credentials = connection.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        return struct.unpack('3i', credentials)[1]
+    
+    def _handle(self, connection: socket.socket, run: Callable[[List[str]], bool]) -> bool:
+        """Run one client request; return False if it asked the daemon to stop"""
+        with connection.makefile('rb') as reader:
+            line = reader.readline()
+        output = DaemonOutput(connection)
+        try:
+            request = json.loads(line)
+        except ValueError:
+            output.write("Error: Malformed daemon request\n")
+            output.send({'status': 2})
+            return True
+        if request.get('stop'):
+            output.send({'status': 0})
+            return False
+        
+        status = 0
+        working_dir = os.getcwd()
+        try:
+            os.chdir(request['cwd'])
+            with redirect_stdout(output), redirect_stderr(output):
+                try:
+                    if not run(request['argv']):
+                        status = 1
+                except SystemExit as e:
+                    status = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+                except Exception:
+                    traceback.print_exc()
+                    status = 1
+        except OSError as e:
+            output.write(f"Error: {e}\n")
+            status = 1
+        finally:
+            os.chdir(working_dir)
+        output.send({'status': status})
+        return True
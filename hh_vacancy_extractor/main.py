@@ -1,14 +1,32 @@
 
 import argparse
+import json
+import os
+import socket
+import sys
+import tempfile
+from contextlib import nullcontext
+from typing import List, Optional
 from views.views import ConsoleView
-from controllers.controllers import HHDataController, JsonToCsvController
-from models.models import *
+
+def default_socket() -> str:
+    """Per-user daemon socket; XDG_RUNTIME_DIR is private already, the temp fallback is created 0700"""
+    return os.environ.get('HH_DAEMON_SOCKET') or os.path.join(
+        os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir(),
+        f"hh_vacancy_extractor-{os.getuid()}", 'daemon.sock'
+    )
+
 
 def setup_parser() -> argparse.ArgumentParser:
     """Setup the command line argument parser"""
     parser = argparse.ArgumentParser(
         description='HH.ru Data Fetcher and JSON to CSV Converter'
     )
+    parser.add_argument('--via-daemon', action='store_true',
+                        help='Run the command in a running daemon; runs locally if none is listening')
+    parser.add_argument('--socket',
+                        help='Daemon socket path (default: $HH_DAEMON_SOCKET, or '
+                             'hh_vacancy_extractor-<uid>/daemon.sock under $XDG_RUNTIME_DIR or the temp directory)')
     
     subparsers = parser.add_subparsers(dest='command', required=True)
     
@@ -64,12 +82,90 @@ def setup_parser() -> argparse.ArgumentParser:
                              help='Number of vacancies per page (default: 100)')
     fetch_parser.add_argument('--all-pages', action='store_true',
                              help='Fetch all available pages')
+    fetch_parser.add_argument('--shard', action='store_true',
+                             help='Fetch all pages, splitting the query into shards '
+                                  'to get past the 2000-result depth limit')
+    fetch_parser.add_argument('--incremental', action='store_true',
+                             help='Fetch only vacancies published since the previous run '
+                                  'of the same query and append them to the output (requires --format ndjson)')
+    fetch_parser.add_argument('--state-dir', type=str, default='.hh_state',
+                             help='Directory for incremental fetch state (default: .hh_state)')
+    fetch_parser.add_argument('--resume', action='store_true',
+                             help='Reuse pages recorded in the journal by an interrupted run')
+    fetch_parser.add_argument('--journal', type=str,
+                             help='Checkpoint journal for --pages/--all-pages (default: <output>.journal)')
+    fetch_parser.add_argument('--concurrency', type=int, default=1,
+                             help='Number of pages to fetch in parallel (default: 1)')
     fetch_parser.add_argument('--output', type=str, default='output.json',
                              help='Output JSON file name')
+    fetch_parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                             help='Output format: one JSON document or one vacancy per line (default: json)')
+    fetch_parser.add_argument('--rate-limit', type=float, default=10.0,
+                             help='Initial requests per second; adapts to API throttling (default: 10)')
+    fetch_parser.add_argument('--max-retries', type=int, default=5,
+                             help='Retries for throttled or failed requests (default: 5)')
+    fetch_parser.add_argument('--db', type=str,
+                             help='SQLite database to upsert fetched vacancies into')
+    fetch_parser.add_argument('--cache-dir', type=str,
+                             help='Directory for caching API responses (disabled if not set)')
+    fetch_parser.add_argument('--cache-ttl', type=float, default=3600,
+                             help='Seconds a cached response stays fresh (default: 3600)')
+    fetch_parser.add_argument('--cache-max-entries', type=int, default=1000,
+                             help='Maximum number of cached responses (default: 1000)')
+    fetch_parser.add_argument('--cache-revalidate', action='store_true',
+                             help='Revalidate stale cached responses with ETag/Last-Modified')
+    fetch_parser.add_argument('--metrics-out', type=str,
+                             help='Write request and stage metrics to this file (.prom for Prometheus textfile, otherwise JSON)')
+    
+    # Vacancy details Parser
+    details_parser = subparsers.add_parser('fetch-details',
+                                           help='Fetch full vacancy details for a fetch output file')
+    details_parser.add_argument('input', help='Fetch output file (JSON or NDJSON)')
+    details_parser.add_argument('-o', '--output', default='details.ndjson',
+                               help='Output NDJSON file path')
+    details_parser.add_argument('--concurrency', type=int, default=1,
+                               help='Number of vacancies to fetch in parallel (default: 1)')
+    details_parser.add_argument('--detail-cache', type=str, default='.hh_details',
+                               help='Directory for cached vacancy details (default: .hh_details)')
+    details_parser.add_argument('--rate-limit', type=float, default=10.0,
+                               help='Initial requests per second (default: 10)')
+    details_parser.add_argument('--max-retries', type=int, default=5,
+                               help='Retries for throttled or failed requests (default: 5)')
+    details_parser.add_argument('--metrics-out', type=str,
+                               help='Write request and stage metrics to this file (.prom for Prometheus textfile, otherwise JSON)')
+    
+    # Batch fetch Parser
+    batch_parser = subparsers.add_parser('fetch-batch',
+                                         help='Fetch many saved searches at once, merging vacancies by id')
+    batch_parser.add_argument('queries',
+                              help='JSON file with a list of queries; keys mirror the fetch options')
+    batch_parser.add_argument('--output', type=str, default='batch.json',
+                              help='Output file name (default: batch.json)')
+    batch_parser.add_argument('--format', choices=['json', 'ndjson'], default='json',
+                              help='Output format (default: json)')
+    batch_parser.add_argument('--concurrency', type=int, default=4,
+                              help='Number of pages to fetch in parallel across all queries (default: 4)')
+    batch_parser.add_argument('--rate-limit', type=float, default=10.0,
+                              help='Initial requests per second (default: 10)')
+    batch_parser.add_argument('--max-retries', type=int, default=5,
+                              help='Retries for throttled or failed requests (default: 5)')
+    batch_parser.add_argument('--db', type=str,
+                              help='SQLite database to upsert fetched vacancies into')
+    batch_parser.add_argument('--cache-dir', type=str,
+                              help='Directory for caching API responses (disabled by default)')
+    batch_parser.add_argument('--cache-ttl', type=float, default=3600,
+                              help='Seconds a cached response stays fresh (default: 3600)')
+    batch_parser.add_argument('--cache-max-entries', type=int, default=1000,
+                              help='Maximum number of cached responses (default: 1000)')
+    batch_parser.add_argument('--cache-revalidate', action='store_true',
+                              help='Revalidate stale cached responses with ETag/Last-Modified')
+    batch_parser.add_argument('--metrics-out', type=str,
+                              help='Write request and stage metrics to this file (.prom for Prometheus textfile, otherwise JSON)')
     
     # JSON to CSV Parser
     convert_parser = subparsers.add_parser('convert', help='Convert JSON to CSV')
-    convert_parser.add_argument('input', help='Input JSON file path')
+    convert_parser.add_argument('input', nargs='*',
+                               help='Input JSON or NDJSON file paths or glob patterns')
     convert_parser.add_argument('-o', '--output', default='output.csv', 
                                help='Output CSV file path')
     convert_parser.add_argument('-a', '--all', action='store_true',
@@ -80,39 +176,221 @@ def setup_parser() -> argparse.ArgumentParser:
                                help='CSV delimiter character')
     convert_parser.add_argument('--no-flatten', action='store_false',
                                help='Do not flatten nested structures')
+    convert_parser.add_argument('-w', '--workers', type=int, default=1,
+                               help='Number of worker processes (default: 1)')
+    convert_parser.add_argument('--chunk-size', type=int, default=64,
+                               help='Split NDJSON inputs into chunks of this many MB (default: 64)')
+    convert_parser.add_argument('--db', type=str,
+                               help='Read vacancies from a SQLite database instead of an input file')
+    convert_parser.add_argument('--where', type=str,
+                               help="SQL filter for --db, e.g. \"salary_from >= 100000 AND area_id = '1'\"")
+    convert_parser.add_argument('--schema-cache', default=None,
+                               help='File for caching the --all column set between runs')
+    convert_parser.add_argument('--explode', type=str, metavar='FIELD',
+                               help='Write one row per element of the list FIELD, e.g. key_skills')
+    convert_parser.add_argument('--explode-child', type=str, metavar='PATH',
+                               help='Write the --explode elements to this CSV, linked by vacancy id')
+    convert_parser.add_argument('--metrics-out', type=str,
+                               help='Write request and stage metrics to this file (.prom for Prometheus textfile, otherwise JSON)')
+    
+    # Aggregation Parser
+    aggregate_parser = subparsers.add_parser('aggregate',
+                                             help='Compute salary and skill statistics in one streaming pass')
+    aggregate_parser.add_argument('input', nargs='*',
+                                  help='Input JSON or NDJSON file paths or glob patterns')
+    aggregate_parser.add_argument('-o', '--output', default='aggregate.json',
+                                  help='Output JSON file path (default: aggregate.json)')
+    aggregate_parser.add_argument('-g', '--group-by', nargs='+', default=['experience.id'],
+                                  help='Fields to group by, dot notation (default: experience.id)')
+    aggregate_parser.add_argument('--currency', default='RUR',
+                                  help='Currency to convert salaries to (default: RUR)')
+    aggregate_parser.add_argument('--rates', type=str,
+                                  help='JSON file with rubles per unit of currency, e.g. {"USD": 92.5}')
+    aggregate_parser.add_argument('--quantiles', type=float, nargs='+', default=[0.1, 0.25, 0.5, 0.75, 0.9],
+                                  help='Salary quantiles to report (default: 0.1 0.25 0.5 0.75 0.9)')
+    aggregate_parser.add_argument('--accuracy', type=float, default=0.01,
+                                  help='Relative accuracy of the quantiles (default: 0.01)')
+    aggregate_parser.add_argument('--top-k', type=int, default=10,
+                                  help='Number of top skills and employers per group (default: 10)')
+    aggregate_parser.add_argument('--db', type=str,
+                                  help='Read vacancies from a SQLite database instead of an input file')
+    aggregate_parser.add_argument('--where', type=str,
+                                  help='SQL filter for --db')
+    
+    # Index Parser
+    index_parser = subparsers.add_parser('index', help='Add fetched vacancies to a local full-text index')
+    index_parser.add_argument('input', nargs='+',
+                              help='Input JSON or NDJSON file paths or glob patterns')
+    index_parser.add_argument('--index-dir', default='.hh_index',
+                              help='Index directory (default: .hh_index)')
+    index_parser.add_argument('--compact', action='store_true',
+                              help='Merge all segments and drop replaced vacancies after indexing')
+    
+    # Search Parser
+    search_parser = subparsers.add_parser('search', help='Search the local index')
+    search_parser.add_argument('query',
+                               help='Words to match (AND); -word excludes, word* matches a prefix, '
+                                    'employer:word limits a word to name/snippet/description/employer/area')
+    search_parser.add_argument('-o', '--output', default='search.ndjson',
+                               help='Output NDJSON file path, ready for convert (default: search.ndjson)')
+    search_parser.add_argument('--index-dir', default='.hh_index',
+                               help='Index directory (default: .hh_index)')
+    search_parser.add_argument('--limit', type=int,
+                               help='Maximum number of vacancies to return')
+    search_parser.add_argument('--ids', action='store_true',
+                               help='Write only matching vacancy ids, one per line')
+    
+    # Daemon Parser
+    daemon_parser = subparsers.add_parser('daemon',
+                                          help='Serve commands from one long-lived process over --socket')
+    daemon_parser.add_argument('--stop', action='store_true',
+                               help='Stop the daemon listening on --socket')
     
     return parser
 
 
-def main():
-    parser = setup_parser()
-    args = parser.parse_args()
+def forward_to_daemon(socket_path: str, request: dict) -> Optional[int]:
+    """Send a request to the daemon and print its output; return None if no daemon is listening"""
+    try:
+        owner = os.lstat(socket_path).st_uid
+    except OSError:
+        return None
+    if owner != os.getuid():
+        ConsoleView.display_error(f"{socket_path} belongs to another user; not connecting")
+        return None
+    
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path)
+    except OSError:
+        client.close()
+        return None
+    
+    with client, client.makefile('r', encoding='utf-8') as replies:
+        client.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        for line in replies:
+            reply = json.loads(line)
+            if 'status' in reply:
+                return reply['status']
+            sys.stdout.write(reply['output'])
+            sys.stdout.flush()
+    return 1
+
+
+def run_command(parser: argparse.ArgumentParser, args: argparse.Namespace) -> bool:
+    """Run one parsed command, importing only the controller it needs; return False on failure"""
     view = ConsoleView()
     
     if args.command == 'fetch':
+        from controllers.controllers import HHDataController
+        from models.models import HHDataFetcher, HHQuerySharder
         controller = HHDataController(view)
         params = controller.build_request(args)
-        
-        pages_to_fetch = None
-        if args.pages:
-            pages_to_fetch = args.pages
-        elif args.page is not None:
-            pages_to_fetch = [args.page]
-        elif args.all_pages:
-            temp_params = params.copy()
-            temp_params['page'] = 0
-            temp_params['per_page'] = 1
-            initial_data = HHDataFetcher.fetch_vacancies(temp_params)
-            if initial_data:
-                total_pages = initial_data.get('pages', 1)
-                pages_to_fetch = list(range(total_pages))
-                view.display_message(f"Fetching all {total_pages} pages...")
-        
-        controller.fetch_data(params, pages_to_fetch, args.output)
+        cache = controller.build_cache(args)
+        with controller.build_store(args) or nullcontext():
+            controller.configure_rate_limit(args)
+            controller.build_metrics(args)
+            
+            if args.incremental:
+                success = controller.fetch_incremental(params, args.output, args.state_dir, args.format)
+            elif args.shard:
+                success = controller.fetch_sharded(params, args.output, args.concurrency, args.format)
+            else:
+                pages_to_fetch = None
+                if args.pages:
+                    pages_to_fetch = args.pages
+                elif args.page is not None:
+                    pages_to_fetch = [args.page]
+                elif args.all_pages:
+                    temp_params = params.copy()
+                    temp_params['page'] = 0
+                    temp_params['per_page'] = 1
+                    initial_data = HHDataFetcher.fetch_vacancies(temp_params, cache=cache)
+                    if initial_data:
+                        total_pages = max(1, HHQuerySharder.pages_for(initial_data.get('found', 0),
+                                                                      params.get('per_page', 100)))
+                        pages_to_fetch = list(range(total_pages))
+                        view.display_message(f"Fetching all {total_pages} pages...")
+                
+                journal_file = None
+                if args.pages or args.all_pages:
+                    journal_file = args.journal or f"{args.output}.journal"
+                success = controller.fetch_data(params, pages_to_fetch, args.output, args.concurrency,
+                                                args.format, journal_file, args.resume)
+            controller.write_metrics(args.metrics_out)
+            return success
+    
+    elif args.command == 'fetch-details':
+        from controllers.controllers import HHDataController
+        controller = HHDataController(view)
+        controller.configure_rate_limit(args)
+        controller.build_metrics(args)
+        success = controller.fetch_details(args.input, args.output, args.concurrency, args.detail_cache)
+        controller.write_metrics(args.metrics_out)
+        return success
+    
+    elif args.command == 'fetch-batch':
+        from controllers.controllers import HHDataController
+        controller = HHDataController(view)
+        queries = controller.load_queries(args.queries)
+        if queries is None:
+            return False
+        controller.build_cache(args)
+        with controller.build_store(args) or nullcontext():
+            controller.configure_rate_limit(args)
+            controller.build_metrics(args)
+            success = controller.fetch_batch(queries, args.output, args.concurrency, args.format)
+            controller.write_metrics(args.metrics_out)
+            return success
     
     elif args.command == 'convert':
+        from controllers.controllers import JsonToCsvController
         controller = JsonToCsvController(view)
-        controller.convert_to_csv(args)
+        return controller.convert_to_csv(args)
+    
+    elif args.command == 'aggregate':
+        from controllers.controllers import VacancyStatsController
+        controller = VacancyStatsController(view)
+        return controller.aggregate(args)
+    
+    elif args.command == 'index':
+        from controllers.controllers import VacancyIndexController
+        controller = VacancyIndexController(view)
+        return controller.index(args)
+    
+    elif args.command == 'search':
+        from controllers.controllers import VacancyIndexController
+        controller = VacancyIndexController(view)
+        return controller.search(args)
+    
+    elif args.command == 'daemon':
+        from controllers.controllers import DaemonController
+        controller = DaemonController(view)
+        return controller.serve(args.socket, lambda argv: run_command(parser, parser.parse_args(argv)))
+
+
+def main():
+    parser = setup_parser()
+    args = parser.parse_args()
+    
+    if args.command == 'daemon' or args.via_daemon:
+        if not hasattr(socket, 'AF_UNIX') or not hasattr(os, 'getuid'):
+            ConsoleView.display_error("The daemon needs unix sockets and user ids, "
+                                      "which this platform does not provide")
+            sys.exit(1)
+        args.socket = args.socket or default_socket()
+    
+    if args.command == 'daemon' and args.stop:
+        if forward_to_daemon(args.socket, {'stop': True}) is None:
+            ConsoleView.display_error(f"No daemon is listening on {args.socket}")
+            sys.exit(1)
+        return
+    if args.via_daemon and args.command != 'daemon':
+        status = forward_to_daemon(args.socket, {'argv': sys.argv[1:], 'cwd': os.getcwd()})
+        if status is not None:
+            sys.exit(status)
+    if not run_command(parser, args):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
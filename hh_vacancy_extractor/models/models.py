@@ -1,8 +1,48 @@
 import json
+import math
 import csv
-import requests
-from urllib.parse import urlencode
-from typing import Dict, List, Optional, Any, Union
+import importlib.util
+import os
+import re
+import random
+import shutil
+import sqlite3
+import hashlib
+import html
+import mmap
+import shlex
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
+from typing import Dict, List, Optional, Any, Union, Callable, Iterator, Iterable, Tuple
+
+
+def lazy_import(name: str) -> Any:
+    """Return module `name`, deferring the actual import until one of its attributes is used"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named {name!r}")
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+# The HTTP stack takes longer to import than a small convert takes to run,
+# so it is only loaded by commands that actually call the API
+requests = lazy_import('requests')
+
 
 class HHRequestBuilder:
     """Model for building HH.ru API request parameters"""
@@ -109,6 +149,14 @@ class HHRequestBuilder:
         self.params['per_page'] = per_page
         return self
     
+    def set_date_range(self, date_from: Optional[str] = None,
+                       date_to: Optional[str] = None) -> 'HHRequestBuilder':
+        if date_from:
+            self.params['date_from'] = date_from
+        if date_to:
+            self.params['date_to'] = date_to
+        return self
+    
     def build(self) -> Dict:
         return self.params
 
@@ -122,13 +170,34 @@ class JsonToCsvBuilder:
             'fields': None,
             'all_fields': False,
             'flatten_nested': True,
-            'delimiter': ','
+            'delimiter': ',',
+            'schema_cache': None,
+            'source_db': None,
+            'where': None,
+            'input_files': None,
+            'workers': 1,
+            'chunk_size': 64 * 2 ** 20,
+            'metrics': None,
+            'explode': None,
+            'explode_child': None
         }
     
     def with_input_file(self, input_file: str) -> 'JsonToCsvBuilder':
         self._config['input_file'] = input_file
         return self
     
+    def with_input_files(self, input_files: List[str]) -> 'JsonToCsvBuilder':
+        self._config['input_files'] = input_files
+        if input_files:
+            self._config['input_file'] = input_files[0]
+        return self
+    
+    def with_workers(self, workers: int, chunk_size: Optional[int] = None) -> 'JsonToCsvBuilder':
+        self._config['workers'] = workers
+        if chunk_size:
+            self._config['chunk_size'] = chunk_size
+        return self
+    
     def with_output_file(self, output_file: str) -> 'JsonToCsvBuilder':
         self._config['output_file'] = output_file
         return self
@@ -149,74 +218,637 @@ class JsonToCsvBuilder:
         self._config['delimiter'] = delimiter
         return self
     
+    def with_schema_cache(self, cache_file: Optional[str]) -> 'JsonToCsvBuilder':
+        self._config['schema_cache'] = cache_file
+        return self
+    
+    def with_source_db(self, db_file: Optional[str], where: Optional[str] = None) -> 'JsonToCsvBuilder':
+        self._config['source_db'] = db_file
+        self._config['where'] = where
+        return self
+    
+    def with_explode(self, field: Optional[str], child_file: Optional[str] = None) -> 'JsonToCsvBuilder':
+        self._config['explode'] = field
+        self._config['explode_child'] = child_file if field else None
+        return self
+    
+    def with_metrics(self, metrics: Optional['MetricsRecorder']) -> 'JsonToCsvBuilder':
+        self._config['metrics'] = metrics
+        return self
+    
     def build(self) -> 'JsonToCsvExtractor':
-        return JsonToCsvExtractor(**self._config)
+        config = dict(self._config)
+        input_files = config.pop('input_files')
+        workers = config.pop('workers')
+        chunk_size = config.pop('chunk_size')
+        if input_files and not config['source_db'] and (len(input_files) > 1 or workers > 1):
+            config.pop('input_file')
+            return ParallelJsonToCsvExtractor(input_files=input_files, workers=workers,
+                                              chunk_size=chunk_size, **config)
+        return JsonToCsvExtractor(**config)
+
+
+class JsonItemReader:
+    """Model for reading vacancies one at a time from JSON, JSON arrays or NDJSON"""
+    CHUNK_SIZE = 1 << 20
+    _WHITESPACE = re.compile(r'[ \t\n\r]*')
+    
+    def __init__(self, input_file: str):
+        self.input_file = input_file
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+    
+    def __iter__(self) -> Iterator[Any]:
+        with open(self.input_file, 'r', encoding='utf-8') as f:
+            self._file = f
+            self._buffer = ''
+            self._pos = 0
+            self._eof = False
+            yield from self._read_document()
+    
+    def _read_document(self) -> Iterator[Any]:
+        first = self._peek()
+        if first == '[':
+            yield from self._read_array()
+        elif first == '{':
+            yield from self._read_object()
+        elif first:
+            raise ValueError(f"Unsupported JSON input in {self.input_file}")
+        
+        # Any further top-level values mean the input is NDJSON
+        while self._peek():
+            yield self._decode_value()
+    
+    def _read_object(self) -> Iterator[Any]:
+        """Stream the HH.ru `items` array if present, otherwise yield the object itself"""
+        record = {}
+        has_items = False
+        self._expect('{')
+        if self._peek() == '}':
+            self._pos += 1
+        else:
+            while True:
+                key = self._decode_value()
+                self._expect(':')
+                if key == 'items' and self._peek() == '[':
+                    has_items = True
+                    yield from self._read_array()
+                else:
+                    record[key] = self._decode_value()
+                if self._peek() == ',':
+                    self._pos += 1
+                    continue
+                self._expect('}')
+                break
+        
+        if not has_items:
+            yield record
+    
+    def _read_array(self) -> Iterator[Any]:
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._peek() == ',':
+                self._pos += 1
+                continue
+            self._expect(']')
+            return
+    
+    def _decode_value(self) -> Any:
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+    
+    def _peek(self) -> str:
+        while True:
+            self._pos = self._WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ''
+    
+    def _expect(self, char: str) -> None:
+        if self._peek() != char:
+            raise ValueError(f"Malformed JSON in {self.input_file}: expected '{char}'")
+        self._pos += 1
+    
+    def _fill(self) -> bool:
+        if self._eof:
+            return False
+        chunk = self._file.read(self.CHUNK_SIZE)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+
+class FieldPathTrie:
+    """Model for reading many dot-notation fields from a record in a single walk"""
+    _MISSING = object()
+    
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        root = {}
+        for column, field in enumerate(fields):
+            children = root
+            node = None
+            for key in field.split('.'):
+                node = children.setdefault(key, ([], {}))
+                children = node[1]
+            node[0].append(column)
+        self._root = self._compile(root)
+    
+    def _compile(self, children: Dict) -> Tuple:
+        """Turn the nested dict into tuples of (key, list_index, columns, children)"""
+        return tuple(
+            (key, int(key) if key.isdigit() else None, tuple(columns), self._compile(grandchildren))
+            for key, (columns, grandchildren) in children.items()
+        )
+    
+    def extract(self, record: Any, transform: Optional[Callable[[Any], Any]] = None) -> List[Any]:
+        """Return the row for `record`; `transform` is applied to dict and list values"""
+        row = [None] * len(self.fields)
+        self._walk(self._root, record, row, transform)
+        return row
+    
+    def _walk(self, children: Tuple, value: Any, row: List[Any],
+              transform: Optional[Callable[[Any], Any]]) -> None:
+        if isinstance(value, dict):
+            for key, _, columns, grandchildren in children:
+                child = value.get(key, self._MISSING)
+                if child is self._MISSING:
+                    continue
+                if columns:
+                    cell = child
+                    if transform is not None and isinstance(child, (dict, list)):
+                        cell = transform(child)
+                    for column in columns:
+                        row[column] = cell
+                if grandchildren:
+                    self._walk(grandchildren, child, row, transform)
+        elif isinstance(value, list):
+            for _, index, columns, grandchildren in children:
+                if index is None or index >= len(value):
+                    continue
+                child = value[index]
+                if columns:
+                    cell = child
+                    if transform is not None and isinstance(child, (dict, list)):
+                        cell = transform(child)
+                    for column in columns:
+                        row[column] = cell
+                if grandchildren:
+                    self._walk(grandchildren, child, row, transform)
+
+
+class SchemaCollector:
+    """Model for collecting the union of field paths across all records"""
+    def __init__(self, known_order: Optional[List[str]] = None):
+        self.fields = []
+        self.order = list(known_order or [])
+        self._field_set = set()
+        self._order_set = set(self.order)
+        self._root = {}
+    
+    def add(self, record: Any) -> bool:
+        """Register any field paths of `record` not seen yet; return True if there were some"""
+        count = len(self.fields)
+        if isinstance(record, dict):
+            self._collect(record, self._root, '')
+        elif isinstance(record, list) and record and isinstance(record[0], dict):
+            self._collect_list(record, self._root, '')
+        return len(self.fields) > count
+    
+    def add_fields(self, paths: Iterable[str]) -> None:
+        """Register already known field paths, e.g. columns collected by another process"""
+        for path in paths:
+            self._register(path)
+    
+    def columns(self) -> List[str]:
+        """Collected fields in stable display order"""
+        return [field for field in self.order if field in self._field_set]
+    
+    def _collect(self, data: Dict, children: Dict, prefix: str) -> None:
+        for key, value in data.items():
+            node = children.get(key)
+            if node is None:
+                path = prefix + key
+                node = children[key] = (path + '.', {})
+                self._register(path)
+            if isinstance(value, dict):
+                self._collect(value, node[1], node[0])
+            elif isinstance(value, list) and value and isinstance(value[0], dict):
+                self._collect_list(value, node[1], node[0])
+    
+    def _collect_list(self, data: List, children: Dict, prefix: str) -> None:
+        for index, item in enumerate(data):
+            if not isinstance(item, dict):
+                continue
+            node = children.get(index)
+            if node is None:
+                node = children[index] = (f"{prefix}{index}.", {})
+            self._collect(item, node[1], node[0])
+    
+    def _register(self, path: str) -> None:
+        if path in self._field_set:
+            return
+        self.fields.append(path)
+        self._field_set.add(path)
+        if path in self._order_set:
+            return
+        
+        # Place a new path right after the last known path sharing its closest ancestor
+        position = len(self.order)
+        ancestor = path
+        while '.' in ancestor:
+            ancestor = ancestor.rpartition('.')[0]
+            descendants = [i for i, field in enumerate(self.order)
+                           if field == ancestor or field.startswith(ancestor + '.')]
+            if descendants:
+                position = descendants[-1] + 1
+                break
+        self.order.insert(position, path)
+        self._order_set.add(path)
+
+
+class SchemaCache:
+    """Model for persisting discovered CSV columns between conversions"""
+    MAX_SCHEMAS = 256
+    
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self._data = {'files': {}, 'schemas': {}, 'order': []}
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    self._data.update(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable schema cache {cache_file}: {e}")
+    
+    @property
+    def order(self) -> List[str]:
+        return self._data['order']
+    
+    def fingerprint(self, input_file: str) -> str:
+        """Content hash of `input_file`, reused while its size and mtime are unchanged"""
+        stat = os.stat(input_file)
+        path = os.path.abspath(input_file)
+        known = self._data['files'].get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        
+        digest = hashlib.sha256()
+        with open(input_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        self._data['files'][path] = {
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()
+        }
+        return digest.hexdigest()
+    
+    def get(self, fingerprint: str) -> Optional[List[str]]:
+        return self._data['schemas'].get(fingerprint)
+    
+    def put(self, fingerprint: str, columns: List[str], order: List[str]) -> None:
+        schemas = self._data['schemas']
+        schemas.pop(fingerprint, None)
+        schemas[fingerprint] = columns
+        while len(schemas) > self.MAX_SCHEMAS:
+            del schemas[next(iter(schemas))]
+        self._data['order'] = order
+        self.save()
+    
+    def update_order(self, order: List[str]) -> None:
+        self._data['order'] = order
+        self.save()
+    
+    def save(self) -> None:
+        temp_file = f"{self.cache_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(temp_file, self.cache_file)
+
+
+class VacancyStore:
+    """Model for storing vacancies in a local SQLite database"""
+    BATCH_SIZE = 500
+    COLUMNS = ['id', 'name', 'employer_id', 'employer_name', 'area_id', 'area_name',
+               'salary_from', 'salary_to', 'salary_currency', 'experience', 'published_at', 'data']
+    
+    def __init__(self, db_file: str, read_only: bool = False):
+        self.db_file = db_file
+        if read_only:
+            # A read-only URI fails on a missing file instead of creating an empty database
+            self._connection = sqlite3.connect(f"file:{quote(os.path.abspath(db_file))}?mode=ro", uri=True)
+            return
+        self._connection = sqlite3.connect(db_file)
+        with self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS vacancies (
+                    id TEXT PRIMARY KEY,
+                    name TEXT,
+                    employer_id TEXT,
+                    employer_name TEXT,
+                    area_id TEXT,
+                    area_name TEXT,
+                    salary_from REAL,
+                    salary_to REAL,
+                    salary_currency TEXT,
+                    experience TEXT,
+                    published_at TEXT,
+                    data TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_vacancies_employer ON vacancies (employer_id);
+                CREATE INDEX IF NOT EXISTS idx_vacancies_area ON vacancies (area_id);
+                CREATE INDEX IF NOT EXISTS idx_vacancies_salary ON vacancies (salary_from, salary_to);
+                CREATE INDEX IF NOT EXISTS idx_vacancies_published ON vacancies (published_at);
+            """)
+    
+    def __enter__(self) -> 'VacancyStore':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        self._connection.close()
+    
+    def upsert(self, items: Iterable[Dict]) -> int:
+        """Insert or update vacancies by id in batched transactions; return the number written"""
+        columns = ', '.join(self.COLUMNS)
+        placeholders = ', '.join('?' for _ in self.COLUMNS)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in self.COLUMNS[1:])
+        query = (f"INSERT INTO vacancies ({columns}) VALUES ({placeholders}) "
+                 f"ON CONFLICT(id) DO UPDATE SET {updates}")
+        
+        count = 0
+        batch = []
+        for item in items:
+            if item.get('id') is None:
+                continue
+            batch.append(self._to_row(item))
+            if len(batch) >= self.BATCH_SIZE:
+                with self._connection:
+                    self._connection.executemany(query, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self._connection:
+                self._connection.executemany(query, batch)
+            count += len(batch)
+        return count
+    
+    def iter_vacancies(self, where: Optional[str] = None) -> Iterator[Dict]:
+        """Yield stored vacancies matching an optional SQL filter over the indexed columns"""
+        query = "SELECT data FROM vacancies"
+        if where:
+            query += f" WHERE {where}"
+        for (data,) in self._connection.execute(query + " ORDER BY rowid"):
+            yield json.loads(data)
+    
+    @staticmethod
+    def _to_row(item: Dict) -> Tuple:
+        employer = item.get('employer') or {}
+        area = item.get('area') or {}
+        salary = item.get('salary') or {}
+        experience = item.get('experience') or {}
+        return (
+            str(item['id']),
+            item.get('name'),
+            employer.get('id'),
+            employer.get('name'),
+            area.get('id'),
+            area.get('name'),
+            salary.get('from'),
+            salary.get('to'),
+            salary.get('currency'),
+            experience.get('id'),
+            item.get('published_at'),
+            json.dumps(item, ensure_ascii=False, separators=(',', ':')),
+        )
 
 
 class JsonToCsvExtractor:
     """Model for extracting data from JSON to CSV"""
+    _REMOVE = object()
+    
     def __init__(self, input_file: str, output_file: str, fields: Optional[List[str]], 
-                 all_fields: bool, flatten_nested: bool, delimiter: str):
+                 all_fields: bool, flatten_nested: bool, delimiter: str,
+                 schema_cache: Optional[str] = None, source_db: Optional[str] = None,
+                 where: Optional[str] = None, metrics: Optional['MetricsRecorder'] = None,
+                 explode: Optional[str] = None, explode_child: Optional[str] = None):
         self.input_file = input_file
         self.output_file = output_file
         self.fields = fields
         self.all_fields = all_fields
         self.flatten_nested = flatten_nested
         self.delimiter = delimiter
+        self.schema_cache = schema_cache
+        self.source_db = source_db
+        self.where = where
+        self.metrics = metrics
+        self.explode = explode
+        self.explode_child = explode_child
+        self.child_fields = None
+        if explode_child and fields:
+            # Fields under the exploded list go to the child CSV, next to the vacancy id
+            child_fields = [field for field in fields
+                            if field == explode or field.startswith(f"{explode}.")]
+            self.fields = [field for field in fields if field not in child_fields]
+            self.child_fields = ['id', 'index'] + (child_fields or [explode])
+        self._accessor = None
         
     def extract(self) -> None:
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        if isinstance(data, dict) and 'items' in data:
-            data = data['items']  # Handle HH.ru API response format
-        
-        if self.all_fields:
-            self.fields = self._get_all_fields(data[0] if isinstance(data, list) else data)
-        
-        rows = []
-        for item in (data if isinstance(data, list) else [data]):
-            row = []
-            for field in self.fields:
-                value = self._get_nested_value(item, field)
-                if self.flatten_nested and isinstance(value, (dict, list)):
-                    value = self._flatten_value(value)
-                row.append(value)
-            rows.append(row)
-        
-        self._write_to_csv(rows)
-    
-    def _get_all_fields(self, data: Dict) -> List[str]:
-        fields = []
-        self._traverse_json(data, [], fields)
-        return fields
-    
-    def _traverse_json(self, data: Any, path: List[str], fields: List[str]) -> None:
-        if isinstance(data, dict):
-            for key, value in data.items():
-                new_path = path + [key]
-                fields.append('.'.join(new_path))
-                self._traverse_json(value, new_path, fields)
-        elif isinstance(data, list) and data and isinstance(data[0], dict):
-            for i, item in enumerate(data):
-                new_path = path + [str(i)]
-                self._traverse_json(item, new_path, fields)
-    
-    def _get_nested_value(self, data: Dict, field_path: str) -> Any:
-        keys = field_path.split('.')
-        value = data
-        for key in keys:
-            if isinstance(value, list) and key.isdigit():
-                key = int(key)
-                if key < len(value):
-                    value = value[key]
-                else:
-                    return None
-            elif isinstance(value, dict) and key in value:
-                value = value[key]
+        items = self._read_items()
+        if not self.explode_child:
+            self._extract(self._explode(items) if self.explode else items)
+            return
+        
+        output_dir = os.path.dirname(os.path.abspath(self.output_file))
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', encoding='utf-8',
+                                         dir=output_dir, delete=False) as child:
+            self._extract(self._explode(items, child))
+        try:
+            with self._stage('explode_child'):
+                JsonToCsvExtractor(child.name, self.explode_child, self.child_fields, self.all_fields,
+                                   self.flatten_nested, self.delimiter).extract()
+        finally:
+            os.remove(child.name)
+    
+    def _extract(self, items: Iterable[Any]) -> None:
+        if not self.all_fields:
+            self._accessor = FieldPathTrie(self.fields)
+            self._write_to_csv(items)
+            return
+        
+        # The schema cache is keyed by input file content, so it only applies to plain file inputs
+        use_cache = self.schema_cache and not self.source_db and not self.explode
+        cache = SchemaCache(self.schema_cache) if use_cache else None
+        fingerprint = cache.fingerprint(self.input_file) if cache else None
+        cached_fields = cache.get(fingerprint) if cache else None
+        if cached_fields is not None:
+            self.fields = cached_fields
+            self._accessor = FieldPathTrie(self.fields)
+            self._write_to_csv(items)
+            return
+        
+        collector = SchemaCollector(cache.order if cache else None)
+        self._write_discovered(items, collector)
+        if cache:
+            cache.put(fingerprint, self.fields, collector.order)
+    
+    def _read_items(self) -> Iterable[Any]:
+        if self.source_db:
+            items = self._read_store()
+        else:
+            items = JsonItemReader(self.input_file)
+        return self.metrics.timed_iter('parse', items) if self.metrics is not None else items
+    
+    def _read_store(self) -> Iterator[Dict]:
+        with VacancyStore(self.source_db, read_only=True) as store:
+            yield from store.iter_vacancies(self.where)
+    
+    def _explode(self, items: Iterable[Any], child: Optional[Any] = None) -> Iterator[Any]:
+        """Yield one record per element of the list at self.explode, or write the elements to `child`"""
+        keys = self.explode.split('.')
+        for record in items:
+            elements = record
+            for key in keys:
+                elements = elements.get(key) if isinstance(elements, dict) else None
+            if elements is None:
+                elements = []
+            elif not isinstance(elements, list):
+                elements = [elements]
+            
+            if child is not None:
+                for index, element in enumerate(elements):
+                    child_record = self._replace({'id': record.get('id'), 'index': index}, keys, element)
+                    child.write(json.dumps(child_record, ensure_ascii=False, separators=(',', ':')))
+                    child.write('\n')
+                yield self._replace(record, keys, self._REMOVE)
+            elif not elements:
+                yield self._replace(record, keys, self._REMOVE)
             else:
-                return None
-        return value
+                for element in elements:
+                    yield self._replace(record, keys, element)
+    
+    @staticmethod
+    def _replace(record: Any, keys: List[str], value: Any) -> Any:
+        """Return a copy of `record` with the value at the `keys` path set, or removed for _REMOVE"""
+        if not isinstance(record, dict):
+            return record
+        copy = dict(record)
+        key = keys[0]
+        if len(keys) > 1:
+            if isinstance(record.get(key), dict) or value is not JsonToCsvExtractor._REMOVE:
+                copy[key] = JsonToCsvExtractor._replace(record.get(key) or {}, keys[1:], value)
+        elif value is JsonToCsvExtractor._REMOVE:
+            copy.pop(key, None)
+        else:
+            copy[key] = value
+        return copy
+    
+    def _build_row(self, item: Any) -> List[Any]:
+        return self._accessor.extract(item, self._flatten_value if self.flatten_nested else None)
+    
+    def _write_rows(self, items: Iterable[Any], writer: Any,
+                    collector: Optional[SchemaCollector] = None,
+                    on_columns: Optional[Callable[[List[str]], None]] = None) -> int:
+        """Write one row per item; with a collector, columns follow its growing display order
+        
+        on_columns is called with the new column list before the first row written under it.
+        """
+        if collector is not None:
+            self._set_columns(collector.columns(), on_columns)
+        count = 0
+        for item in items:
+            if collector is not None and collector.add(item):
+                self._set_columns(collector.columns(), on_columns)
+            writer.writerow(self._build_row(item))
+            count += 1
+        return count
+    
+    def _set_columns(self, columns: List[str],
+                     on_columns: Optional[Callable[[List[str]], None]]) -> None:
+        self._accessor = FieldPathTrie(columns)
+        if on_columns is not None:
+            on_columns(columns)
+    
+    def _write_discovered(self, items: Iterable[Any], collector: SchemaCollector) -> None:
+        """Write rows while the column set is still growing, then emit them under the final header"""
+        output_dir = os.path.dirname(os.path.abspath(self.output_file))
+        with tempfile.TemporaryFile('w+', newline='', encoding='utf-8', dir=output_dir) as spill:
+            layouts = []
+            self._write_rows(items, csv.writer(spill, delimiter=self.delimiter), collector,
+                             lambda columns: layouts.append((spill.tell(), columns)))
+            self.fields = collector.columns()
+            spill.flush()
+            
+            with self._stage('merge'), open(self.output_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=self.delimiter)
+                writer.writerow(self.fields)
+                self._copy_rows(spill.buffer, f, layouts, self.fields, self.delimiter)
+    
+    def _stage(self, name: str) -> Any:
+        return self.metrics.stage(name) if self.metrics is not None else nullcontext()
+    
+    @staticmethod
+    def _copy_rows(spill: Any, output: Any, layouts: List[Tuple[int, List[str]]],
+                   fields: List[str], delimiter: str) -> None:
+        """Copy a binary spill into the text file `output`, one (offset, columns) layout at a time
+        
+        Bytes already laid out in `fields` order are copied as they are; only rows written
+        before the column set last changed are parsed and reordered.
+        """
+        writer = csv.writer(output, delimiter=delimiter)
+        spill.seek(0, os.SEEK_END)
+        ends = [offset for offset, _ in layouts[1:]] + [spill.tell()]
+        for (start, columns), end in zip(layouts, ends):
+            if start == end:
+                continue
+            spill.seek(start)
+            if columns == fields:
+                output.flush()
+                remaining = end - start
+                while remaining > 0:
+                    chunk = spill.read(min(remaining, 2 ** 20))
+                    output.buffer.write(chunk)
+                    remaining -= len(chunk)
+                continue
+            
+            positions = {field: i for i, field in enumerate(columns)}
+            mapping = [positions.get(field) for field in fields]
+            lines = JsonToCsvExtractor._read_lines(spill, end)
+            for row in csv.reader(lines, delimiter=delimiter):
+                writer.writerow([row[i] if i is not None else None for i in mapping])
+    
+    @staticmethod
+    def _read_lines(spill: Any, end: int) -> Iterator[str]:
+        position = spill.tell()
+        while position < end:
+            line = spill.readline()
+            if not line:
+                break
+            position += len(line)
+            yield line.decode('utf-8')
     
     def _flatten_value(self, value: Any) -> str:
         if isinstance(value, dict):
@@ -234,52 +866,1618 @@ class JsonToCsvExtractor:
                 return ', '.join(str(x) for x in value)
         return str(value)
     
-    def _write_to_csv(self, rows: List[List[Any]]) -> None:
+    def _write_to_csv(self, items: Iterable[Any]) -> None:
         with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
             writer = csv.writer(f, delimiter=self.delimiter)
             writer.writerow(self.fields)
-            writer.writerows(rows)
+            self._write_rows(items, writer)
+
+
+class ParallelJsonToCsvExtractor(JsonToCsvExtractor):
+    """Model for converting many or very large JSON inputs to one CSV in a process pool"""
+    SNIFF_LIMIT = 2 ** 20
+    
+    def __init__(self, input_files: List[str], output_file: str, fields: Optional[List[str]],
+                 all_fields: bool, flatten_nested: bool, delimiter: str,
+                 schema_cache: Optional[str] = None, workers: int = 1,
+                 chunk_size: int = 64 * 2 ** 20, source_db: Optional[str] = None,
+                 where: Optional[str] = None, metrics: Optional['MetricsRecorder'] = None,
+                 explode: Optional[str] = None, explode_child: Optional[str] = None):
+        super().__init__(input_files[0], output_file, fields, all_fields, flatten_nested,
+                         delimiter, schema_cache, metrics=metrics, explode=explode,
+                         explode_child=explode_child)
+        self.input_files = input_files
+        self.workers = workers
+        self.chunk_size = chunk_size
+    
+    def extract(self) -> None:
+        use_cache = self.schema_cache and self.all_fields and not self.explode
+        cache = SchemaCache(self.schema_cache) if use_cache else None
+        # Like the serial extractor, a single input whose content is cached skips discovery
+        fingerprint = cache.fingerprint(self.input_files[0]) if cache and len(self.input_files) == 1 else None
+        cached_fields = cache.get(fingerprint) if fingerprint else None
+        discover = self.all_fields and cached_fields is None
+        if cached_fields is not None:
+            self.fields = cached_fields
+        output_dir = os.path.dirname(os.path.abspath(self.output_file))
+        temp_dir = tempfile.mkdtemp(prefix='convert-', dir=output_dir)
+        try:
+            tasks = [dict(task, index=index, temp_dir=temp_dir, fields=self.fields,
+                          delimiter=self.delimiter, all_fields=discover,
+                          flatten_nested=self.flatten_nested,
+                          explode=self.explode, explode_child=bool(self.explode_child))
+                     for index, task in enumerate(self._plan_tasks())]
+            with self._stage('workers'):
+                if self.workers > 1:
+                    from concurrent.futures import ProcessPoolExecutor
+                    with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                        results = list(executor.map(ParallelJsonToCsvExtractor._convert_task, tasks))
+                else:
+                    results = [ParallelJsonToCsvExtractor._convert_task(task) for task in tasks]
+            if self.metrics is not None:
+                self.metrics.add_rows('workers', sum(result['rows'] for result in results))
+            
+            if discover:
+                collector = SchemaCollector(cache.order if cache else None)
+                for result in results:
+                    collector.add_fields(result['columns'])
+                self.fields = collector.columns()
+            
+            with self._stage('merge'), open(self.output_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f, delimiter=self.delimiter)
+                writer.writerow(self.fields)
+                for result in results:
+                    with open(result['path'], 'rb') as spill:
+                        self._copy_rows(spill, f, result['layouts'], self.fields, self.delimiter)
+            
+            if discover and fingerprint:
+                cache.put(fingerprint, self.fields, collector.order)
+            elif discover and cache:
+                cache.update_order(collector.order)
+            
+            if self.explode_child:
+                with self._stage('explode_child'):
+                    ParallelJsonToCsvExtractor(
+                        [result['child_path'] for result in results], self.explode_child,
+                        self.child_fields, self.all_fields, self.flatten_nested, self.delimiter,
+                        workers=self.workers, chunk_size=self.chunk_size
+                    ).extract()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    def _plan_tasks(self) -> List[Dict]:
+        """Split NDJSON inputs larger than chunk_size into line-aligned byte ranges"""
+        tasks = []
+        for input_file in self.input_files:
+            size = os.path.getsize(input_file)
+            if size <= self.chunk_size or not self._is_ndjson(input_file):
+                tasks.append({'input_file': input_file, 'start': None, 'end': None})
+                continue
+            for start in range(0, size, self.chunk_size):
+                tasks.append({'input_file': input_file, 'start': start,
+                              'end': min(start + self.chunk_size, size)})
+        return tasks
+    
+    @staticmethod
+    def _is_ndjson(input_file: str) -> bool:
+        """An NDJSON file starts with a complete JSON object that is not an `items` envelope
+        
+        Only a bounded prefix is read: a compact single-line JSON document can be gigabytes long.
+        """
+        with open(input_file, 'r', encoding='utf-8') as f:
+            first_char = f.read(1)
+            while first_char.isspace():
+                first_char = f.read(1)
+            if first_char != '{':
+                return False
+            first_line = first_char + f.readline(ParallelJsonToCsvExtractor.SNIFF_LIMIT)
+        if not first_line.endswith('\n') and len(first_line) > ParallelJsonToCsvExtractor.SNIFF_LIMIT:
+            return False
+        try:
+            record = json.loads(first_line)
+        except ValueError:
+            return False
+        return isinstance(record, dict) and 'items' not in record
+    
+    @staticmethod
+    def _read_range(input_file: str, start: int, end: int) -> Iterator[Any]:
+        """Yield records of the lines that start inside [start, end)"""
+        with open(input_file, 'rb') as f:
+            if start > 0:
+                f.seek(start - 1)
+                f.readline()
+            while f.tell() < end:
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    yield json.loads(line)
+    
+    @staticmethod
+    def _convert_task(task: Dict) -> Dict:
+        """Convert one input or byte range to a headerless CSV in the task's own column order"""
+        extractor = JsonToCsvExtractor(task['input_file'], None, task['fields'], task['all_fields'],
+                                       task['flatten_nested'], task['delimiter'], explode=task['explode'])
+        if task['start'] is None:
+            items = JsonItemReader(task['input_file'])
+        else:
+            items = ParallelJsonToCsvExtractor._read_range(task['input_file'], task['start'], task['end'])
+        
+        collector = SchemaCollector() if task['all_fields'] else None
+        layouts = []
+        if collector is None:
+            extractor._accessor = FieldPathTrie(task['fields'])
+            layouts.append((0, task['fields']))
+        path = os.path.join(task['temp_dir'], f"{task['index']:06d}.csv")
+        child_path = os.path.join(task['temp_dir'], f"{task['index']:06d}.child.ndjson")
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, delimiter=task['delimiter'])
+            on_columns = lambda columns: layouts.append((f.tell(), columns))
+            if not task['explode']:
+                rows = extractor._write_rows(items, writer, collector, on_columns)
+            elif not task['explode_child']:
+                rows = extractor._write_rows(extractor._explode(items), writer, collector, on_columns)
+            else:
+                with open(child_path, 'w', encoding='utf-8') as child:
+                    rows = extractor._write_rows(extractor._explode(items, child), writer,
+                                                 collector, on_columns)
+        
+        columns = collector.columns() if collector is not None else task['fields']
+        return {'path': path, 'child_path': child_path, 'layouts': layouts,
+                'columns': columns, 'rows': rows}
+
+
+class NdjsonWriter:
+    """Model for streaming vacancies to a newline-delimited JSON file"""
+    def __init__(self, output_file: str, mode: str = 'w'):
+        self.output_file = output_file
+        self.mode = mode
+        self.count = 0
+        self._file = None
+    
+    def __enter__(self) -> 'NdjsonWriter':
+        self._file = open(self.output_file, self.mode, encoding='utf-8')
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+        self._file = None
+    
+    def write_items(self, items: List[Dict]) -> None:
+        for item in items:
+            self._file.write(json.dumps(item, ensure_ascii=False, separators=(',', ':')))
+            self._file.write('\n')
+        self._file.flush()
+        self.count += len(items)
+    
+    @staticmethod
+    def metadata_path(output_file: str) -> str:
+        return f"{output_file}.meta.json"
+    
+    @staticmethod
+    def read_metadata(output_file: str) -> Dict:
+        try:
+            with open(NdjsonWriter.metadata_path(output_file), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def write_metadata(self, metadata: Dict) -> None:
+        with open(self.metadata_path(self.output_file), 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+
+class PageJournal:
+    """Model for checkpointing fetched pages so an interrupted fetch can resume"""
+    def __init__(self, journal_file: str, params: Dict):
+        self.journal_file = journal_file
+        query = {key: value for key, value in params.items() if key != 'page'}
+        self.query = HHResponseCache.make_key(HHDataFetcher.BASE_URL, query)
+        self._file = None
+    
+    def open(self, resume: bool = False) -> Optional[Dict[int, Dict]]:
+        """Start the journal and return pages finished by a previous run, or None for another query"""
+        pages = {}
+        if resume and os.path.exists(self.journal_file):
+            pages = self._load()
+            if pages is None:
+                return None
+        if self._file is None:
+            self._file = open(self.journal_file, 'w', encoding='utf-8')
+            self._append({'query': self.query})
+        return pages
+    
+    def record(self, page: int, data: Dict) -> None:
+        self._append({'page': page, 'found': data.get('found', 0),
+                      'pages': data.get('pages', 0), 'items': data.get('items', [])})
+    
+    def close(self, remove: bool = False) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.journal_file):
+            os.remove(self.journal_file)
+    
+    def _load(self) -> Optional[Dict[int, Dict]]:
+        pages = {}
+        valid_size = 0
+        with open(self.journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # A run killed mid-write leaves a torn last line; it is dropped and refetched
+                    break
+                if not line.endswith(b'\n'):
+                    break
+                if valid_size == 0 and entry.get('query') != self.query:
+                    return None
+                if 'page' in entry:
+                    pages[entry.pop('page')] = entry
+                valid_size += len(line)
+        
+        if valid_size == 0:
+            return {}
+        self._file = open(self.journal_file, 'r+', encoding='utf-8')
+        self._file.truncate(valid_size)
+        self._file.seek(valid_size)
+        return pages
+    
+    def _append(self, entry: Dict) -> None:
+        self._file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+class HHResponseCache:
+    """Model for caching HH.ru API responses on disk"""
+    def __init__(self, cache_dir: str, ttl: Optional[float] = 3600, max_entries: int = 1000,
+                 revalidate: bool = False):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.revalidate = revalidate
+        self.hits = 0
+        self.misses = 0
+        self.revalidated_hits = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._entries = sum(1 for name in os.listdir(cache_dir) if name.endswith('.json'))
+    
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict] = None) -> str:
+        """Hash of the URL and parameters, independent of parameter and list value order"""
+        canonical = {}
+        for key, value in (params or {}).items():
+            if isinstance(value, (list, tuple)):
+                canonical[key] = sorted(str(v) for v in value)
+            else:
+                canonical[key] = str(value)
+        payload = json.dumps([url, canonical], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Tuple[Optional[Any], Dict[str, str]]:
+        """Return (data, {}) for a fresh entry, otherwise (None, conditional request headers)"""
+        entry = self._load(key)
+        if entry is not None and (self.ttl is None or time.time() - entry['stored_at'] < self.ttl):
+            self._touch(key)
+            with self._lock:
+                self.hits += 1
+            return entry['data'], {}
+        
+        with self._lock:
+            self.misses += 1
+        headers = {}
+        if entry is not None and self.revalidate:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return None, headers
+    
+    def revalidated(self, key: str) -> Optional[Any]:
+        """Mark a stale entry as fresh again after a 304 Not Modified response"""
+        entry = self._load(key)
+        if entry is None:
+            return None
+        entry['stored_at'] = time.time()
+        self._write(key, entry)
+        with self._lock:
+            self.misses -= 1
+            self.revalidated_hits += 1
+        return entry['data']
+    
+    def put(self, key: str, data: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        headers = headers or {}
+        is_new = not os.path.exists(self._path(key))
+        self._write(key, {
+            'stored_at': time.time(),
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'data': data,
+        })
+        if is_new:
+            with self._lock:
+                self._entries += 1
+                over_limit = self._entries > self.max_entries
+            if over_limit:
+                self._evict()
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated_hits,
+            'evictions': self.evictions,
+        }
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def _load(self, key: str) -> Optional[Dict]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write(self, key: str, entry: Dict) -> None:
+        temp_file = f"{self._path(key)}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_file, self._path(key))
+    
+    def _touch(self, key: str) -> None:
+        try:
+            os.utime(self._path(key))
+        except OSError:
+            pass
+    
+    def _evict(self) -> None:
+        """Drop least recently used entries down to 90% of max_entries"""
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    path = os.path.join(self.cache_dir, name)
+                    try:
+                        entries.append((os.path.getmtime(path), path))
+                    except OSError:
+                        continue
+            entries.sort()
+            excess = len(entries) - int(self.max_entries * 0.9)
+            for _, path in entries[:max(excess, 0)]:
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except OSError:
+                    pass
+            self._entries = len(entries) - max(excess, 0)
+
+
+class RateLimiter:
+    """Model for pacing API requests with an adaptive token bucket"""
+    def __init__(self, rate: float = 10.0, min_rate: float = 0.5, max_rate: float = 50.0,
+                 burst: float = 5.0, increase: float = 0.5):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.burst = burst
+        self.increase = increase
+        self.throttled = 0
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Block until a request may be sent"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now >= self._blocked_until and self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = max(self._blocked_until - now, (1 - self._tokens) / self.rate)
+            time.sleep(wait)
+    
+    def on_success(self) -> None:
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+    
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        """Halve the rate and, if the server asked for it, pause every caller"""
+        with self._lock:
+            self.throttled += 1
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+
+class MetricsRecorder:
+    """Model for collecting per-request and per-stage metrics of a run"""
+    QUANTILES = (0.5, 0.9, 0.99)
+    
+    def __init__(self):
+        self.requests = []
+        self.stages = {}
+        self.rows = Counter()
+        self._lock = threading.Lock()
+        self._started = time.time()
+    
+    def record_request(self, **request: Any) -> None:
+        with self._lock:
+            self.requests.append(request)
+    
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add_stage_time(name, time.perf_counter() - started)
+    
+    def timed_iter(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Yield from `items`, counting them and the time spent producing them as stage `name`"""
+        iterator = iter(items)
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._add_stage_time(name, time.perf_counter() - started)
+                return
+            self._add_stage_time(name, time.perf_counter() - started)
+            self.add_rows(name)
+            yield item
+    
+    def add_rows(self, name: str, count: int = 1) -> None:
+        with self._lock:
+            self.rows[name] += count
+    
+    def _add_stage_time(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+    
+    def summary(self) -> Dict:
+        network = [request for request in self.requests if request['status'] != 'cache']
+        latencies = sorted(request['seconds'] for request in network)
+        return {
+            'started_at': datetime.fromtimestamp(self._started, timezone.utc).strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'duration_seconds': time.time() - self._started,
+            'requests': {
+                'total': len(self.requests),
+                'by_status': dict(Counter(str(request['status']) for request in self.requests)),
+                'cache_hits': sum(1 for request in self.requests if request['cache_hit']),
+                'retries': sum(request['retries'] for request in self.requests),
+                'bytes': sum(request['bytes'] for request in self.requests),
+                'server_seconds': sum(request['server_seconds'] for request in network),
+                'connect_seconds': sum(request['connect_seconds'] for request in network),
+                'new_connections': sum(request['new_connections'] for request in network),
+                'reused_connections': sum(1 for request in network if not request['new_connections']),
+                'decode_seconds': sum(request['decode_seconds'] for request in network),
+                'latency_seconds': {
+                    'count': len(latencies),
+                    'sum': sum(latencies),
+                    'max': latencies[-1] if latencies else 0.0,
+                    **{str(q): self._quantile(latencies, q) for q in self.QUANTILES},
+                },
+            },
+            'stages': {name: {'seconds': seconds, 'rows': self.rows.get(name, 0)}
+                       for name, seconds in self.stages.items()},
+            'rows': dict(self.rows),
+        }
+    
+    def write(self, output_file: str) -> None:
+        """Write a JSON report, or a Prometheus textfile if the name ends with .prom"""
+        if output_file.endswith('.prom'):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(dict(self.summary(), request_log=self.requests),
+                                 ensure_ascii=False, indent=2)
+        temp_file = f"{output_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(temp_file, output_file)
+    
+    def to_prometheus(self) -> str:
+        summary = self.summary()
+        requests_summary = summary['requests']
+        lines = [
+            '# HELP hh_requests_total API requests by HTTP status ("cache" for cache hits).',
+            '# TYPE hh_requests_total counter',
+        ]
+        lines += [f'hh_requests_total{{status="{status}"}} {count}'
+                  for status, count in requests_summary['by_status'].items()]
+        for name, help_text, value in (
+            ('hh_request_retries_total', 'Retried API requests.', requests_summary['retries']),
+            ('hh_response_bytes_total', 'Response body bytes received.', requests_summary['bytes']),
+            ('hh_cache_hits_total', 'Responses served from the cache.', requests_summary['cache_hits']),
+            ('hh_connections_opened_total', 'New API connections, each with DNS, TCP and TLS setup.',
+             requests_summary['new_connections']),
+            ('hh_connect_seconds_total', 'Time spent opening API connections.',
+             requests_summary['connect_seconds']),
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value}']
+        
+        latency = requests_summary['latency_seconds']
+        lines += ['# HELP hh_request_latency_seconds API request latency including retries.',
+                  '# TYPE hh_request_latency_seconds summary']
+        lines += [f'hh_request_latency_seconds{{quantile="{q}"}} {latency[str(q)]:.6f}'
+                  for q in self.QUANTILES]
+        lines += [f'hh_request_latency_seconds_sum {latency["sum"]:.6f}',
+                  f'hh_request_latency_seconds_count {latency["count"]}']
+        
+        lines += ['# HELP hh_stage_seconds Time spent in each pipeline stage.',
+                  '# TYPE hh_stage_seconds gauge']
+        lines += [f'hh_stage_seconds{{stage="{name}"}} {stage["seconds"]:.6f}'
+                  for name, stage in summary['stages'].items()]
+        lines += ['# HELP hh_rows_total Records processed by each pipeline stage.',
+                  '# TYPE hh_rows_total counter']
+        lines += [f'hh_rows_total{{stage="{name}"}} {count}' for name, count in summary['rows'].items()]
+        lines += ['# HELP hh_run_duration_seconds Wall time of the run.',
+                  '# TYPE hh_run_duration_seconds gauge',
+                  f'hh_run_duration_seconds {summary["duration_seconds"]:.6f}']
+        return '\n'.join(lines) + '\n'
+    
+    @staticmethod
+    def _quantile(values: List[float], q: float) -> float:
+        if not values:
+            return 0.0
+        return values[min(len(values) - 1, int(q * len(values)))]
 
 
 class HHDataFetcher:
     """Model for fetching data from HH.ru API"""
+    BASE_URL = os.environ.get('HH_API_URL', "https://api.hh.ru/vacancies")
+    REQUEST_TIMEOUT = 30
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    max_retries = 5
+    backoff_base = 0.5
+    backoff_cap = 30.0
+    rate_limiter = RateLimiter()
+    metrics: Optional['MetricsRecorder'] = None
+    _session: Optional['requests.Session'] = None
+    _pool_size = 0
+    _session_lock = threading.Lock()
+    _pool_classes: Optional[Dict[str, type]] = None
+    # Connection setup of the request running in this thread, filled in by the timed pools
+    _connection_stats = threading.local()
+    
+    @classmethod
+    def get_session(cls, pool_size: int = 1) -> 'requests.Session':
+        """Return the process-wide keep-alive session, growing its pool if needed"""
+        with cls._session_lock:
+            if cls._session is None:
+                cls._session = requests.Session()
+            if pool_size > cls._pool_size:
+                from requests.adapters import HTTPAdapter
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+                adapter.poolmanager.pool_classes_by_scheme = cls._timed_pool_classes()
+                cls._session.mount('https://', adapter)
+                cls._session.mount('http://', adapter)
+                cls._pool_size = pool_size
+            return cls._session
+    
+    @classmethod
+    def _timed_pool_classes(cls) -> Dict[str, type]:
+        """urllib3 pool classes whose connections report DNS, TCP and TLS setup time"""
+        if cls._pool_classes is None:
+            from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+            stats = cls._connection_stats
+            
+            def timed(pool_class: type) -> type:
+                class TimedConnection(pool_class.ConnectionCls):
+                    def connect(self) -> None:
+                        started = time.perf_counter()
+                        try:
+                            super().connect()
+                        finally:
+                            elapsed = time.perf_counter() - started
+                            stats.connections = getattr(stats, 'connections', 0) + 1
+                            stats.connect_seconds = getattr(stats, 'connect_seconds', 0.0) + elapsed
+                            stats.attempt_connect_seconds = elapsed
+                return type(f"Timed{pool_class.__name__}", (pool_class,), {'ConnectionCls': TimedConnection})
+            
+            cls._pool_classes = {'http': timed(HTTPConnectionPool), 'https': timed(HTTPSConnectionPool)}
+        return cls._pool_classes
+    
     @staticmethod
-    def fetch_vacancies(params: Dict, pages: Optional[Union[int, List[int]]] = None) -> Optional[Dict]:
-        base_url = "https://api.hh.ru/vacancies"
-        all_results = {'items': [], 'found': 0, 'pages': 0}
+    def get_json(base_url: str, params: Optional[Dict] = None,
+                 cache: Optional[HHResponseCache] = None) -> Any:
+        url = f"{base_url}?{urlencode(params, doseq=True)}" if params else base_url
+        started = time.perf_counter()
+        stats = HHDataFetcher._connection_stats
+        stats.connections, stats.connect_seconds, stats.attempt_connect_seconds = 0, 0.0, 0.0
+        headers = {}
+        key = None
+        if cache is not None:
+            key = cache.make_key(base_url, params)
+            data, headers = cache.get(key)
+            if data is not None:
+                HHDataFetcher._record(url, 'cache', started, cache_hit=True)
+                return data
         
-        if pages is None:
-            query_string = urlencode(params, doseq=True)
-            url = f"{base_url}?{query_string}"
-            
+        retries = 0
+        response = None
+        try:
+            response, retries = HHDataFetcher._get_with_retries(url, headers)
+            if response.status_code == 304:
+                data = cache.revalidated(key)
+                if data is not None:
+                    HHDataFetcher._record(url, 304, started, response, retries, cache_hit=True)
+                    return data
+                response, more_retries = HHDataFetcher._get_with_retries(url, {})
+                retries += more_retries
+            response.raise_for_status()
+            decode_started = time.perf_counter()
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as error:
+            status = response.status_code if response is not None else 'error'
+            retries = getattr(error, 'retries', retries)
+            HHDataFetcher._record(url, status, started, response, retries)
+            raise
+        
+        HHDataFetcher._record(url, response.status_code, started, response, retries,
+                              decode_seconds=time.perf_counter() - decode_started)
+        if cache is not None:
+            cache.put(key, data, response.headers)
+        return data
+    
+    @staticmethod
+    def _record(url: str, status: Any, started: float, response: Optional['requests.Response'] = None,
+                retries: int = 0, cache_hit: bool = False, decode_seconds: float = 0.0) -> None:
+        metrics = HHDataFetcher.metrics
+        if metrics is None:
+            return
+        # response.elapsed also covers opening a connection; that part is reported as connect_seconds
+        stats = HHDataFetcher._connection_stats
+        elapsed = response.elapsed.total_seconds() if response is not None else 0.0
+        metrics.record_request(
+            url=url,
+            status=status,
+            seconds=time.perf_counter() - started,
+            server_seconds=max(0.0, elapsed - stats.attempt_connect_seconds) if response is not None else 0.0,
+            connect_seconds=stats.connect_seconds,
+            new_connections=stats.connections,
+            bytes=len(response.content) if response is not None else 0,
+            retries=retries,
+            cache_hit=cache_hit,
+            decode_seconds=decode_seconds,
+        )
+    
+    @staticmethod
+    def _get_with_retries(url: str, headers: Dict[str, str]) -> Tuple['requests.Response', int]:
+        """GET through the shared rate limiter, retrying throttling and transient failures"""
+        session = HHDataFetcher.get_session()
+        limiter = HHDataFetcher.rate_limiter
+        attempt = 0
+        while True:
+            limiter.acquire()
+            HHDataFetcher._connection_stats.attempt_connect_seconds = 0.0
             try:
-                response = requests.get(url)
-                response.raise_for_status()
-                return response.json()
-            except requests.exceptions.RequestException as e:
+                response = session.get(url, headers=headers, timeout=HHDataFetcher.REQUEST_TIMEOUT)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                if attempt >= HHDataFetcher.max_retries:
+                    error.retries = attempt
+                    raise
+                time.sleep(HHDataFetcher._backoff(attempt))
+                attempt += 1
+                continue
+            
+            if response.status_code not in HHDataFetcher.RETRY_STATUSES:
+                limiter.on_success()
+                return response, attempt
+            
+            retry_after = HHDataFetcher._retry_after(response)
+            if response.status_code in (429, 503):
+                limiter.on_throttle(retry_after)
+            if attempt >= HHDataFetcher.max_retries:
+                return response, attempt
+            time.sleep(retry_after if retry_after is not None else HHDataFetcher._backoff(attempt))
+            attempt += 1
+    
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(HHDataFetcher.backoff_cap, HHDataFetcher.backoff_base * 2 ** attempt))
+    
+    @staticmethod
+    def _retry_after(response: 'requests.Response') -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        from email.utils import parsedate_to_datetime
+        try:
+            return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def fetch_page(params: Dict, page: Optional[int] = None,
+                   cache: Optional[HHResponseCache] = None) -> Optional[Dict]:
+        page_params = dict(params)
+        if page is not None:
+            page_params['page'] = page
+        
+        try:
+            return HHDataFetcher.get_json(HHDataFetcher.BASE_URL, page_params, cache)
+        except requests.exceptions.RequestException as e:
+            if page is None:
                 print(f"Error fetching data: {e}")
-                return None
+            else:
+                print(f"Error fetching page {page}: {e}")
+            return None
+    
+    @staticmethod
+    def iter_pages(params: Dict, pages: List[int], concurrency: int = 1,
+                   cache: Optional[HHResponseCache] = None) -> Iterator[Tuple[int, Optional[Dict]]]:
+        """Yield (page, data) pairs in page order, fetching up to `concurrency` pages at once"""
+        requests_to_fetch = [(params, page) for page in pages]
+        yield from zip(pages, HHDataFetcher.iter_requests(requests_to_fetch, concurrency, cache))
+    
+    @staticmethod
+    def iter_requests(requests_to_fetch: Iterable[Tuple[Dict, int]], concurrency: int = 1,
+                      cache: Optional[HHResponseCache] = None) -> Iterator[Optional[Dict]]:
+        """Yield the data of each (params, page) request in order"""
+        return HHDataFetcher.map_ordered(
+            lambda request: HHDataFetcher.fetch_page(request[0], request[1], cache),
+            requests_to_fetch, concurrency
+        )
+    
+    @staticmethod
+    def map_ordered(function: Callable[[Any], Any], arguments: Iterable[Any],
+                    concurrency: int = 1) -> Iterator[Any]:
+        """Lazily yield function(argument) in input order, running up to `concurrency` calls at once"""
+        if concurrency <= 1:
+            for argument in arguments:
+                yield function(argument)
+            return
+        
+        HHDataFetcher.get_session(concurrency)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            # Keep a bounded window of calls in flight so finished results never pile up
+            pending = deque()
+            for argument in arguments:
+                pending.append(executor.submit(function, argument))
+                if len(pending) >= concurrency * 2:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    
+    @staticmethod
+    def fetch_vacancies(params: Dict, pages: Optional[Union[int, List[int]]] = None,
+                        concurrency: int = 1,
+                        cache: Optional[HHResponseCache] = None) -> Optional[Dict]:
+        if pages is None:
+            return HHDataFetcher.fetch_page(params, cache=cache)
+        
+        if isinstance(pages, int):
+            pages = [pages]
+        
+        return HHDataFetcher.merge_pages(HHDataFetcher.iter_pages(params, pages, concurrency, cache))
+    
+    @staticmethod
+    def merge_pages(page_results: Iterable[Tuple[Any, Optional[Dict]]]) -> Dict:
+        all_results = {'items': [], 'found': 0, 'pages': 0}
+        failed_pages = []
+        metadata_set = False
+        for page, data in page_results:
+            if data is None:
+                failed_pages.append(page)
+                continue
+            if not metadata_set:
+                all_results['found'] = data.get('found', 0)
+                all_results['pages'] = data.get('pages', 0)
+                metadata_set = True
+            all_results['items'].extend(data.get('items', []))
+        if failed_pages:
+            all_results['failed_pages'] = failed_pages
+        return all_results
+
+
+class HHDetailFetcher:
+    """Model for enriching search results with full vacancy details"""
+    def __init__(self, concurrency: int = 1, cache: Optional[HHResponseCache] = None):
+        self.concurrency = concurrency
+        self.cache = cache
+        self.failed_ids = []
+    
+    def fetch_detail(self, vacancy_id: str) -> Optional[Dict]:
+        try:
+            return HHDataFetcher.get_json(f"{HHDataFetcher.BASE_URL}/{vacancy_id}", cache=self.cache)
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching vacancy {vacancy_id}: {e}")
+            return None
+    
+    def iter_enriched(self, items: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield each vacancy once, merged with its detail record, in input order"""
+        seen_ids = set()
+        
+        def unique_items() -> Iterator[Dict]:
+            for item in items:
+                vacancy_id = item.get('id')
+                if vacancy_id is None or vacancy_id in seen_ids:
+                    continue
+                seen_ids.add(vacancy_id)
+                yield item
+        
+        def enrich(item: Dict) -> Dict:
+            detail = self.fetch_detail(item['id'])
+            if detail is None:
+                self.failed_ids.append(item['id'])
+                return item
+            return {**item, **detail}
+        
+        yield from HHDataFetcher.map_ordered(enrich, unique_items(), self.concurrency)
+
+
+class HHQuerySharder:
+    """Model for splitting a query into shards that each fit under the API depth limit"""
+    DEPTH_LIMIT = 2000
+    MIN_WINDOW = timedelta(minutes=1)
+    DATE_FORMAT = '%Y-%m-%dT%H:%M:%S%z'
+    # Only fields every vacancy has exactly one value of, so the shards partition the query;
+    # work_format can be empty or multi-valued and would silently drop vacancies
+    SPLIT_FIELDS = [
+        ('experience', ['noExperience', 'between1And3', 'between3And6', 'moreThan6']),
+    ]
+    
+    def __init__(self, params: Dict, concurrency: int = 1,
+                 cache: Optional[HHResponseCache] = None):
+        self.params = params
+        self.concurrency = concurrency
+        self.cache = cache
+        self.per_page = int(params.get('per_page', 100))
+        self.found = 0
+        self.total_pages = 0
+    
+    @staticmethod
+    def pages_for(found: int, per_page: int) -> int:
+        """Number of pages the API will serve for `found` results"""
+        return -(-min(found, HHQuerySharder.DEPTH_LIMIT) // per_page)
+    
+    def plan(self) -> List[Tuple[Dict, int]]:
+        """Return (shard params, found) pairs whose results together cover the query"""
+        found = self._count_all([self.params])[0]
+        if found is None:
+            return []
+        self.found = found
+        
+        shards = []
+        pending = [(self.params, found)]
+        while pending:
+            splits = []
+            for params, shard_found in pending:
+                if shard_found <= self.DEPTH_LIMIT:
+                    shards.append((params, shard_found))
+                    continue
+                children = self._split(params)
+                if children is None:
+                    hint = '' if self._has_window(params) else '; pass --period to split it by date'
+                    print(f"Shard {self._describe(params)} still has {shard_found} vacancies; "
+                          f"only the first {self.DEPTH_LIMIT} can be fetched{hint}")
+                    shards.append((params, shard_found))
+                else:
+                    splits.append((params, shard_found, children))
+            
+            counts = self._count_all([child for _, _, children in splits for child in children])
+            pending = []
+            for params, shard_found, children in splits:
+                child_counts = [counts.pop(0) for _ in children]
+                if None not in child_counts and sum(child_counts) < shard_found:
+                    print(f"Shards of {self._describe(params)} cover {sum(child_counts)} of "
+                          f"{shard_found} vacancies; the rest cannot be fetched")
+                for child, count in zip(children, child_counts):
+                    if count is None:
+                        print(f"Could not count shard {self._describe(child)}; "
+                              f"fetching it up to the depth limit")
+                        count = self.DEPTH_LIMIT
+                    if count:
+                        pending.append((child, count))
+        
+        self.total_pages = sum(self.pages_for(count, self.per_page) for _, count in shards)
+        return shards
+    
+    def iter_pages(self, shards: List[Tuple[Dict, int]]) -> Iterator[Tuple[int, Optional[Dict]]]:
+        """Fetch every page of every shard, dropping vacancies already seen in earlier shards"""
+        requests_to_fetch = [(params, page) for params, count in shards
+                             for page in range(self.pages_for(count, self.per_page))]
+        results = HHDataFetcher.iter_requests(requests_to_fetch, self.concurrency, self.cache)
+        seen_ids = set()
+        for (params, page), data in zip(requests_to_fetch, results):
+            if data is None:
+                yield page, None
+                continue
+            items = []
+            for item in data.get('items', []):
+                if item.get('id') not in seen_ids:
+                    seen_ids.add(item.get('id'))
+                    items.append(item)
+            yield page, {'items': items, 'found': self.found, 'pages': self.total_pages}
+    
+    def _count_all(self, shards: List[Dict]) -> List[Optional[int]]:
+        probes = [(dict(params, per_page=1), 0) for params in shards]
+        return [data.get('found', 0) if data is not None else None
+                for data in HHDataFetcher.iter_requests(probes, self.concurrency, self.cache)]
+    
+    def _split(self, params: Dict) -> Optional[List[Dict]]:
+        for name, values in self.SPLIT_FIELDS:
+            current = params.get(name)
+            if not current or len(current) > 1:
+                return [dict(params, **{name: [value]}) for value in (current or values)]
+        return self._split_dates(params) if self._has_window(params) else None
+    
+    @staticmethod
+    def _has_window(params: Dict) -> bool:
+        """Dates are only bisected inside a window the user asked for, so nothing older is lost"""
+        return 'date_from' in params or bool(params.get('period'))
+    
+    def _split_dates(self, params: Dict) -> Optional[List[Dict]]:
+        date_from, date_to = self._date_window(params)
+        if date_to - date_from <= self.MIN_WINDOW:
+            return None
+        
+        middle = date_from + (date_to - date_from) / 2
+        base = {key: value for key, value in params.items() if key != 'period'}
+        return [
+            dict(base, date_from=date_from.strftime(self.DATE_FORMAT),
+                 date_to=middle.strftime(self.DATE_FORMAT)),
+            dict(base, date_from=middle.strftime(self.DATE_FORMAT),
+                 date_to=date_to.strftime(self.DATE_FORMAT)),
+        ]
+    
+    def _date_window(self, params: Dict) -> Tuple[datetime, datetime]:
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        date_to = datetime.strptime(params['date_to'], self.DATE_FORMAT) if 'date_to' in params else now
+        if 'date_from' in params:
+            date_from = datetime.strptime(params['date_from'], self.DATE_FORMAT)
         else:
-            if isinstance(pages, int):
-                pages = [pages]
+            date_from = date_to - timedelta(days=int(params['period']))
+        return date_from, date_to
+    
+    @staticmethod
+    def _describe(params: Dict) -> str:
+        keys = ['experience', 'work_format', 'date_from', 'date_to']
+        return ', '.join(f"{key}={params[key]}" for key in keys if key in params) or 'query'
+
+
+class HHIncrementalSync:
+    """Model for fetching only vacancies published since the previous run of a query"""
+    OVERLAP = timedelta(hours=1)
+    DATE_FORMAT = HHQuerySharder.DATE_FORMAT
+    
+    def __init__(self, params: Dict, state_dir: str):
+        self.params = params
+        self.failed = False
+        query = {key: value for key, value in params.items()
+                 if key not in ('page', 'per_page', 'date_from', 'date_to', 'period', 'order_by')}
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_file = os.path.join(
+            state_dir, f"{HHResponseCache.make_key(HHDataFetcher.BASE_URL, query)}.json"
+        )
+        self.state = {'query': query, 'watermark': None, 'seen': {}}
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        self._newest = self._parse(self.state['watermark'])
+    
+    @property
+    def watermark(self) -> Optional[str]:
+        return self.state['watermark']
+    
+    def iter_pages(self) -> Iterator[Tuple[int, Optional[Dict]]]:
+        """Yield pages of unseen vacancies, newest first, stopping at already synced ones"""
+        params = dict(self.params, order_by='publication_time')
+        watermark = self._parse(self.watermark)
+        if watermark is not None:
+            params.pop('period', None)
+            params['date_from'] = (watermark - self.OVERLAP).strftime(self.DATE_FORMAT)
+        
+        seen = self.state['seen']
+        per_page = int(params.get('per_page', 100))
+        page = 0
+        while True:
+            data = HHDataFetcher.fetch_page(params, page)
+            if data is None:
+                self.failed = True
+                yield page, None
+                return
             
-            for page in pages:
-                params['page'] = page
-                query_string = urlencode(params, doseq=True)
-                url = f"{base_url}?{query_string}"
-                
-                try:
-                    response = requests.get(url)
-                    response.raise_for_status()
-                    data = response.json()
-                    
-                    if page == pages[0]:
-                        all_results['found'] = data.get('found', 0)
-                        all_results['pages'] = data.get('pages', 0)
-                    
-                    all_results['items'].extend(data.get('items', []))
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching page {page}: {e}")
-                    continue
+            items = data.get('items', [])
+            new_items = [item for item in items if item.get('id') not in seen]
+            for item in new_items:
+                seen[item.get('id')] = item.get('published_at')
+                published_at = self._parse(item.get('published_at'))
+                if published_at is not None and (self._newest is None or published_at > self._newest):
+                    self._newest = published_at
+            yield page, dict(data, items=new_items)
+            
+            page += 1
+            if (not new_items or page >= data.get('pages', 0)
+                    or page * per_page >= HHQuerySharder.DEPTH_LIMIT):
+                return
+    
+    def save(self) -> None:
+        """Persist seen ids and, if every page was fetched, advance the watermark"""
+        if not self.failed and self._newest is not None:
+            self.state['watermark'] = self._newest.strftime(self.DATE_FORMAT)
+        
+        # Only ids inside the overlap window can come back from the next request
+        watermark = self._parse(self.watermark)
+        if watermark is not None:
+            cutoff = watermark - self.OVERLAP
+            self.state['seen'] = {
+                vacancy_id: published_at for vacancy_id, published_at in self.state['seen'].items()
+                if self._parse(published_at) is None or self._parse(published_at) >= cutoff
+            }
+        
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(temp_file, self.state_file)
+    
+    @classmethod
+    def _parse(cls, value: Optional[str]) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.strptime(value, cls.DATE_FORMAT)
+        except ValueError:
+            return None
+
+
+class HHBatchFetcher:
+    """Model for running many saved searches at once and merging their vacancies by id"""
+    def __init__(self, queries: List[Tuple[str, Dict, Optional[List[int]]]], concurrency: int = 1,
+                 cache: Optional[HHResponseCache] = None):
+        self.queries = queries
+        self.concurrency = concurrency
+        self.cache = cache
+        self.matches = {}
+        self.summary = {name: {'found': 0, 'pages': 0, 'items': 0, 'failed_pages': []}
+                        for name, params, pages in queries}
+    
+    def iter_pages(self) -> Iterator[Tuple[str, int, Optional[Dict]]]:
+        """Yield (query, page, data) for every page of every query, keeping only unseen vacancies"""
+        # The first page of each query tells how many more pages it has
+        first_requests = [(params, pages[0] if pages else 0) for name, params, pages in self.queries]
+        first_results = HHDataFetcher.iter_requests(first_requests, self.concurrency, self.cache)
+        remaining = []
+        for (name, params, pages), (_, page), data in zip(self.queries, first_requests, first_results):
+            if data is None:
+                self.summary[name]['failed_pages'].append(page)
+            else:
+                self.summary[name]['found'] = data.get('found', 0)
+                self.summary[name]['pages'] = data.get('pages', 0)
+            yield name, page, self._unique(name, data)
+            
+            if pages:
+                rest = pages[1:]
+            elif data is not None:
+                per_page = int(params.get('per_page', 100))
+                rest = range(1, HHQuerySharder.pages_for(data.get('found', 0), per_page))
+            else:
+                rest = []
+            remaining.extend((name, params, rest_page) for rest_page in rest)
+        
+        results = HHDataFetcher.iter_requests(
+            [(params, page) for name, params, page in remaining], self.concurrency, self.cache
+        )
+        for (name, params, page), data in zip(remaining, results):
+            if data is None:
+                self.summary[name]['failed_pages'].append(page)
+            yield name, page, self._unique(name, data)
+    
+    def _unique(self, name: str, data: Optional[Dict]) -> Optional[Dict]:
+        if data is None:
+            return None
+        items = data.get('items', [])
+        self.summary[name]['items'] += len(items)
+        new_items = []
+        for item in items:
+            vacancy_id = item.get('id')
+            matched = self.matches.get(vacancy_id)
+            if vacancy_id is None:
+                new_items.append(item)
+            elif matched is None:
+                self.matches[vacancy_id] = [name]
+                new_items.append(item)
+            elif name not in matched:
+                matched.append(name)
+        return dict(data, items=new_items)
+
+
+class QuantileSketch:
+    """Model for approximate quantiles in bounded memory using log-spaced buckets"""
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 2048):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.max_buckets = max_buckets
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+    
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+        if value <= 0:
+            self.zero_count += 1
+            return
+        
+        # Every value in bucket i lies in (gamma^(i-1), gamma^i], so its estimate is off by at most the accuracy
+        index = math.ceil(math.log(value) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        if len(self.buckets) > self.max_buckets:
+            lowest, second = sorted(self.buckets)[:2]
+            self.buckets[second] += self.buckets.pop(lowest)
+    
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+    
+    def summary(self, quantiles: Iterable[float]) -> Dict:
+        return {
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+            'mean': self.total / self.count if self.count else None,
+            'quantiles': {str(q): self.quantile(q) for q in quantiles},
+        }
+
+
+class TopK:
+    """Model for approximate top-K counts in bounded memory (Space-Saving)"""
+    def __init__(self, k: int = 10, capacity: Optional[int] = None):
+        self.k = k
+        self.capacity = capacity or k * 10
+        self.counts = {}
+    
+    def add(self, item: Any) -> None:
+        counts = self.counts
+        if item in counts:
+            counts[item] += 1
+        elif len(counts) < self.capacity:
+            counts[item] = 1
+        else:
+            # The newcomer inherits the smallest counter, so counts are upper bounds
+            victim = min(counts, key=counts.get)
+            counts[item] = counts.pop(victim) + 1
+    
+    def top(self) -> List[Tuple[Any, int]]:
+        return sorted(self.counts.items(), key=lambda pair: (-pair[1], str(pair[0])))[:self.k]
+
+
+class SalaryNormalizer:
+    """Model for converting salary ranges to one currency"""
+    # Approximate rubles per unit; HH.ru reports rubles as RUR
+    DEFAULT_RATES = {
+        'RUR': 1.0, 'RUB': 1.0, 'USD': 90.0, 'EUR': 100.0, 'KZT': 0.19, 'BYR': 28.0,
+        'UAH': 2.2, 'UZS': 0.0072, 'KGS': 1.05, 'AZN': 53.0, 'GEL': 33.0
+    }
+    
+    def __init__(self, currency: str = 'RUR', rates: Optional[Dict[str, float]] = None):
+        self.rates = dict(self.DEFAULT_RATES)
+        self.rates.update({code.upper(): float(rate) for code, rate in (rates or {}).items()})
+        self.currency = currency.upper()
+        if self.currency not in self.rates:
+            raise ValueError(f"No exchange rate for {self.currency}")
+        self.unknown_currencies = Counter()
+    
+    def convert(self, salary: Optional[Dict]) -> Tuple[Optional[float], Optional[float]]:
+        """Return (from, to) in the target currency, or (None, None) if the salary can't be converted"""
+        if not isinstance(salary, dict):
+            return None, None
+        currency = (salary.get('currency') or self.currency).upper()
+        rate = self.rates.get(currency)
+        if rate is None:
+            self.unknown_currencies[currency] += 1
+            return None, None
+        factor = rate / self.rates[self.currency]
+        salary_from, salary_to = salary.get('from'), salary.get('to')
+        return (salary_from * factor if salary_from is not None else None,
+                salary_to * factor if salary_to is not None else None)
+
+
+class VacancyAggregator:
+    """Model for streaming group-by statistics over vacancies"""
+    def __init__(self, group_by: List[str], normalizer: SalaryNormalizer, top_k: int = 10,
+                 relative_accuracy: float = 0.01):
+        self.group_by = group_by
+        self.normalizer = normalizer
+        self.top_k = top_k
+        self.relative_accuracy = relative_accuracy
+        self.total = 0
+        self.groups = {}
+        self._accessor = FieldPathTrie(group_by)
+    
+    def add(self, vacancy: Dict) -> None:
+        self.total += 1
+        key = tuple(self._accessor.extract(vacancy, lambda value: json.dumps(value, ensure_ascii=False)))
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {
+                'count': 0,
+                'salary_from': QuantileSketch(self.relative_accuracy),
+                'salary_to': QuantileSketch(self.relative_accuracy),
+                'skills': TopK(self.top_k),
+                'employers': TopK(self.top_k),
+            }
+        group['count'] += 1
+        
+        salary_from, salary_to = self.normalizer.convert(vacancy.get('salary'))
+        if salary_from is not None:
+            group['salary_from'].add(salary_from)
+        if salary_to is not None:
+            group['salary_to'].add(salary_to)
+        for skill in vacancy.get('key_skills') or []:
+            name = skill.get('name') if isinstance(skill, dict) else skill
+            if name:
+                group['skills'].add(name)
+        employer = vacancy.get('employer')
+        if isinstance(employer, dict) and employer.get('name'):
+            group['employers'].add(employer['name'])
+    
+    def add_all(self, vacancies: Iterable[Dict]) -> 'VacancyAggregator':
+        for vacancy in vacancies:
+            self.add(vacancy)
+        return self
+    
+    def result(self, quantiles: Iterable[float] = (0.1, 0.25, 0.5, 0.75, 0.9)) -> Dict:
+        quantiles = list(quantiles)
+        groups = []
+        for key, group in sorted(self.groups.items(), key=lambda pair: (-pair[1]['count'], str(pair[0]))):
+            groups.append({
+                'key': dict(zip(self.group_by, key)),
+                'count': group['count'],
+                'salary_from': group['salary_from'].summary(quantiles),
+                'salary_to': group['salary_to'].summary(quantiles),
+                'top_skills': group['skills'].top(),
+                'top_employers': group['employers'].top(),
+            })
+        return {
+            'group_by': self.group_by,
+            'currency': self.normalizer.currency,
+            'total': self.total,
+            'unknown_currencies': dict(self.normalizer.unknown_currencies),
+            'groups': groups,
+        }
+
+
+class IndexSegment:
+    """Model for reading one immutable segment of a VacancyIndex through memory maps"""
+    def __init__(self, index_dir: str, name: str, deleted: Iterable[int] = ()):
+        self.name = name
+        self.deleted = set(deleted)
+        base = os.path.join(index_dir, name)
+        self._files = []
+        self._terms = self._map(f"{base}.terms")
+        self._lexicon = self._map(f"{base}.lexicon", 'Q')
+        self._postings = self._map(f"{base}.postings", 'I')
+        self._docs = self._map(f"{base}.docs")
+        self._offsets = self._map(f"{base}.offsets", 'Q')
+        self.term_count = len(self._lexicon) // 3
+        self.doc_count = max(len(self._offsets) - 1, 0)
+    
+    def _map(self, path: str, typecode: Optional[str] = None) -> Any:
+        f = open(path, 'rb')
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return memoryview(b'').cast(typecode) if typecode else b''
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._files.append(data)
+        return memoryview(data).cast(typecode) if typecode else data
+    
+    def close(self) -> None:
+        for views in (self._lexicon, self._postings, self._offsets):
+            views.release()
+        for f in reversed(self._files):
+            f.close()
+    
+    def _term(self, position: int) -> bytes:
+        start = self._lexicon[3 * position]
+        end = self._lexicon[3 * position + 3] if position + 1 < self.term_count else len(self._terms)
+        return self._terms[start:end - 1]
+    
+    def _find(self, term: bytes) -> int:
+        """Position of the first term that is >= `term` (terms are sorted by their UTF-8 bytes)"""
+        low, high = 0, self.term_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._term(middle) < term:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+    
+    def _postings_at(self, position: int) -> memoryview:
+        start, count = self._lexicon[3 * position + 1], self._lexicon[3 * position + 2]
+        return self._postings[start:start + count]
+    
+    def postings(self, term: str, prefix: bool = False) -> set:
+        """Local ids of documents containing `term`, or any term starting with it if `prefix`"""
+        encoded = term.encode('utf-8')
+        position = self._find(encoded)
+        if not prefix:
+            if position < self.term_count and self._term(position) == encoded:
+                return set(self._postings_at(position))
+            return set()
+        
+        matches = set()
+        while position < self.term_count and self._term(position).startswith(encoded):
+            matches.update(self._postings_at(position))
+            position += 1
+        return matches
+    
+    def document(self, local_id: int) -> bytes:
+        return self._docs[self._offsets[local_id]:self._offsets[local_id + 1]]
+
+
+class VacancyIndex:
+    """Model for a persistent, segment-based full-text index over fetched vacancies"""
+    INDEXED_FIELDS = (
+        ('name', 'name'),
+        ('snippet.requirement', 'snippet'),
+        ('snippet.responsibility', 'snippet'),
+        ('description', 'description'),
+        ('employer.name', 'employer'),
+        ('area.name', 'area'),
+    )
+    SEGMENT_SIZE = 50000
+    _TOKEN = re.compile(r'\w+')
+    _TAG = re.compile(r'<[^>]+>')
+    
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.manifest_path = os.path.join(index_dir, 'manifest.json')
+        self.manifest = {'next_segment': 1, 'segments': []}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self._accessor = FieldPathTrie([path for path, _ in self.INDEXED_FIELDS])
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return cls._TOKEN.findall(html.unescape(cls._TAG.sub(' ', text)).lower())
+    
+    def add(self, items: Iterable[Dict]) -> Tuple[int, int]:
+        """Index new and changed vacancies into new segments; return (indexed, unchanged) counts"""
+        os.makedirs(self.index_dir, exist_ok=True)
+        locations = self._locations()
+        indexed = unchanged = 0
+        segment = None
+        for item in items:
+            line = json.dumps(item, ensure_ascii=False, separators=(',', ':'))
+            digest = hashlib.sha1(line.encode('utf-8')).hexdigest()[:16]
+            vacancy_id = str(item.get('id'))
+            previous = locations.get(vacancy_id)
+            if previous is not None and previous[2] == digest:
+                unchanged += 1
+                continue
             
-            return all_results
\ No newline at end of file
+            if segment is None:
+                segment = self._new_segment()
+            # The older copy stays on disk but stops matching once this segment is committed
+            if previous is not None:
+                segment['supersedes'].append(previous[:2])
+            locations[vacancy_id] = (segment['name'], len(segment['ids']), digest)
+            self._add_document(segment, vacancy_id, digest, line, item)
+            indexed += 1
+            if len(segment['ids']) >= self.SEGMENT_SIZE:
+                self._commit(segment)
+                segment = None
+        
+        if segment is not None:
+            self._commit(segment)
+        else:
+            self._save_manifest()
+        return indexed, unchanged
+    
+    def compact(self) -> None:
+        """Rewrite the live documents of all segments into as few segments as possible
+        
+        The manifest is replaced once, after every new segment is on disk, so a crash
+        leaves either the old segments or the compacted ones in place.
+        """
+        old_segments = self.manifest['segments']
+        new_segments = []
+        segment = None
+        for entry in old_segments:
+            reader = IndexSegment(self.index_dir, entry['name'], entry['deleted'])
+            ids = self._read_ids(entry['name'])
+            try:
+                for local_id in range(reader.doc_count):
+                    if local_id in reader.deleted:
+                        continue
+                    if segment is None:
+                        segment = self._new_segment()
+                    line = reader.document(local_id).decode('utf-8').rstrip('\n')
+                    vacancy_id, digest = ids[local_id]
+                    self._add_document(segment, vacancy_id, digest, line, json.loads(line))
+                    if len(segment['ids']) >= self.SEGMENT_SIZE:
+                        new_segments.append(self._write_segment(segment))
+                        segment = None
+            finally:
+                reader.close()
+        if segment is not None:
+            new_segments.append(self._write_segment(segment))
+        self.manifest['segments'] = new_segments
+        self._save_manifest()
+        
+        # Drops the old segments and any files left by an interrupted compaction
+        live = {entry['name'] for entry in new_segments}
+        for file_name in os.listdir(self.index_dir):
+            if file_name.startswith('seg-') and file_name.partition('.')[0] not in live:
+                os.remove(os.path.join(self.index_dir, file_name))
+    
+    def search(self, query: str, limit: Optional[int] = None) -> Iterator[bytes]:
+        """Yield the stored NDJSON line of every live vacancy matching all terms of `query`"""
+        required, excluded = self.parse_query(query)
+        if not required:
+            raise ValueError("The query needs at least one term that is not excluded")
+        
+        found = 0
+        for entry in self.manifest['segments']:
+            segment = IndexSegment(self.index_dir, entry['name'], entry['deleted'])
+            try:
+                matches = None
+                for clause in required:
+                    matches = self._match_clause(segment, clause, matches)
+                    if not matches:
+                        break
+                for clause in excluded:
+                    if matches:
+                        matches -= self._match_clause(segment, clause)
+                for local_id in sorted(matches - segment.deleted):
+                    yield segment.document(local_id)
+                    found += 1
+                    if limit is not None and found >= limit:
+                        return
+            finally:
+                segment.close()
+    
+    @classmethod
+    def parse_query(cls, query: str) -> Tuple[List[List[Tuple[str, bool]]], List[List[Tuple[str, bool]]]]:
+        """Split a query into required and excluded clauses of (term, is_prefix) pairs
+
+        Words are ANDed; `-word` excludes, `word*` matches a prefix and `employer:word`
+        (or name:, snippet:, description:, area:) searches a single field.
+        """
+        prefixes = {prefix for _, prefix in cls.INDEXED_FIELDS}
+        required, excluded = [], []
+        for part in shlex.split(query):
+            negative = part.startswith('-')
+            part = part.lstrip('-')
+            field, _, text = part.partition(':')
+            if field not in prefixes or not text:
+                field, text = None, part
+            is_prefix = text.endswith('*')
+            tokens = cls.tokenize(text)
+            if not tokens:
+                continue
+            clause = [(f"{field}:{token}" if field else token, False) for token in tokens]
+            if is_prefix:
+                clause[-1] = (clause[-1][0], True)
+            (excluded if negative else required).append(clause)
+        return required, excluded
+    
+    @staticmethod
+    def _match_clause(segment: IndexSegment, clause: List[Tuple[str, bool]],
+                      matches: Optional[set] = None) -> set:
+        for term, prefix in clause:
+            postings = segment.postings(term, prefix)
+            matches = postings if matches is None else matches & postings
+            if not matches:
+                break
+        return matches
+    
+    def _locations(self) -> Dict[str, Tuple[str, int, str]]:
+        """Map each live vacancy id to its (segment, local id, digest)"""
+        locations = {}
+        for entry in self.manifest['segments']:
+            deleted = set(entry['deleted'])
+            for local_id, (vacancy_id, digest) in enumerate(self._read_ids(entry['name'])):
+                if local_id not in deleted:
+                    locations[vacancy_id] = (entry['name'], local_id, digest)
+        return locations
+    
+    def _read_ids(self, name: str) -> List[List[str]]:
+        with open(os.path.join(self.index_dir, f"{name}.ids"), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def _new_segment(self) -> Dict:
+        name = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest['next_segment'] += 1
+        return {'name': name, 'ids': [], 'postings': {}, 'supersedes': [],
+                'docs': open(os.path.join(self.index_dir, f"{name}.docs"), 'wb'), 'offsets': array('Q', [0])}
+    
+    def _add_document(self, segment: Dict, vacancy_id: str, digest: str, line: str, item: Dict) -> None:
+        local_id = len(segment['ids'])
+        segment['ids'].append((vacancy_id, digest))
+        data = (line + '\n').encode('utf-8')
+        segment['docs'].write(data)
+        segment['offsets'].append(segment['offsets'][-1] + len(data))
+        
+        terms = set()
+        for (_, prefix), value in zip(self.INDEXED_FIELDS, self._accessor.extract(item)):
+            if isinstance(value, str):
+                for token in self.tokenize(value):
+                    terms.add(token)
+                    terms.add(f"{prefix}:{token}")
+        postings = segment['postings']
+        for term in terms:
+            local_ids = postings.get(term)
+            if local_ids is None:
+                local_ids = postings[term] = array('I')
+            local_ids.append(local_id)
+    
+    def _commit(self, segment: Dict) -> None:
+        """Write the segment, then publish it in the manifest and apply its deletions"""
+        entry = self._write_segment(segment)
+        entries = {existing['name']: existing for existing in self.manifest['segments']}
+        for name, local_id in segment['supersedes']:
+            (entry if name == segment['name'] else entries[name])['deleted'].append(local_id)
+        self.manifest['segments'].append(entry)
+        self._save_manifest()
+    
+    def _write_segment(self, segment: Dict) -> Dict:
+        """Write the segment's files to disk and return its manifest entry, without publishing it"""
+        self._sync(segment['docs'])
+        segment['docs'].close()
+        base = os.path.join(self.index_dir, segment['name'])
+        lexicon = array('Q')
+        term_offset = postings_start = 0
+        with open(f"{base}.terms", 'wb') as terms_file, open(f"{base}.postings", 'wb') as postings_file:
+            for term in sorted(segment['postings'], key=lambda term: term.encode('utf-8')):
+                encoded = term.encode('utf-8') + b'\n'
+                local_ids = segment['postings'][term]
+                terms_file.write(encoded)
+                postings_file.write(local_ids.tobytes())
+                lexicon.extend((term_offset, postings_start, len(local_ids)))
+                term_offset += len(encoded)
+                postings_start += len(local_ids)
+            self._sync(terms_file)
+            self._sync(postings_file)
+        for extension, data in (('lexicon', lexicon.tobytes()), ('offsets', segment['offsets'].tobytes()),
+                                ('ids', json.dumps(segment['ids'], ensure_ascii=False).encode('utf-8'))):
+            with open(f"{base}.{extension}", 'wb') as f:
+                f.write(data)
+                self._sync(f)
+        return {'name': segment['name'], 'documents': len(segment['ids']), 'deleted': []}
+    
+    @staticmethod
+    def _sync(f: Any) -> None:
+        f.flush()
+        os.fsync(f.fileno())
+    
+    def _save_manifest(self) -> None:
+        temp_file = f"{self.manifest_path}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+            self._sync(f)
+        os.replace(temp_file, self.manifest_path)
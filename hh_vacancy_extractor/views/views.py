@@ -19,4 +19,24 @@ class ConsoleView:
     def display_parameters(params: Dict) -> None:
         print("Current parameters:")
         for key, value in params.items():
-            print(f"  {key}: {value}")
\ No newline at end of file
+            print(f"  {key}: {value}")
+    
+    @staticmethod
+    def display_cache_stats(stats: Dict) -> None:
+        print("Cache: " + ", ".join(f"{key}: {value}" for key, value in stats.items()))
+    
+    @staticmethod
+    def display_aggregates(result: Dict) -> None:
+        print(f"Salaries in {result['currency']} by {', '.join(result['group_by'])}:")
+        for group in result['groups']:
+            key = ', '.join(str(value) for value in group['key'].values())
+            salary_from, salary_to = group['salary_from'], group['salary_to']
+            median_from = salary_from['quantiles'].get('0.5')
+            median_to = salary_to['quantiles'].get('0.5')
+            skills = ', '.join(name for name, count in group['top_skills'][:5])
+            print(f"  {key}: {group['count']} vacancies, "
+                  f"median from {median_from and round(median_from)}, median to {median_to and round(median_to)}"
+                  + (f"; top skills: {skills}" if skills else ""))
+        if result['unknown_currencies']:
+            print("Skipped salaries in unknown currencies: "
+                  + ", ".join(f"{code}: {count}" for code, count in result['unknown_currencies'].items()))